@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Attendance write benchmark: group commit vs one transaction per scan
+
+Simulates the morning rush: T handler threads each persist N scan events to
+a scratch SQLite database (WAL mode, biometric_events schema) and wait for
+each one to be durable before moving on, as a handler does before it ACKs.
+
+  per-row   each thread commits its own row on its own connection
+  group     every thread submits to one AttendanceWriter
+
+Reports events/sec and per-event commit latency for both modes.
+
+Usage:
+  python3 tools/bench_attendance_writer.py
+  python3 tools/bench_attendance_writer.py --threads 64 --events 200 --batch-ms 2 --json
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from biometric_attendance_writer import INSERT_EVENT_SQL, AttendanceWriter, event_row, open_write_connection
+from biometric_load_generator import percentile
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS biometric_events (
+       id INTEGER PRIMARY KEY AUTOINCREMENT,
+       member_id INTEGER,
+       biometric_id TEXT,
+       event_type TEXT NOT NULL,
+       device_id TEXT,
+       timestamp TEXT NOT NULL,
+       success BOOLEAN NOT NULL,
+       error_message TEXT,
+       raw_data TEXT,
+       sensor_member_id TEXT,
+       created_at TEXT DEFAULT (datetime('now'))
+    )
+'''
+
+
+def sample_row(thread_index, i):
+    data = {
+        'userId': str(thread_index * 1000 + i), 'status': 'clock_in', 'deviceId': f'TERM_{thread_index % 8}',
+        'messageType': 'timelog', 'timestamp': '2026-10-01T06:00:00', 'member': {'id': i},
+        'raw_message': '{"userId":"%d","status":"clock_in"}' % i,
+    }
+    return event_row('time_log', data)
+
+
+def run_threads(threads, worker):
+    latencies = [[] for _ in range(threads)]
+    errors = [0] * threads
+    pool = [threading.Thread(target=worker, args=(t, latencies[t], errors)) for t in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    merged = sorted(ms for per_thread in latencies for ms in per_thread)
+    return elapsed, merged, sum(errors)
+
+
+def bench_per_row(db_path, threads, events, synchronous):
+    def worker(t, latencies, errors):
+        conn = open_write_connection(db_path, synchronous, busy_timeout_ms=30000)
+        for i in range(events):
+            started = time.perf_counter()
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.execute(INSERT_EVENT_SQL, sample_row(t, i))
+                conn.execute('COMMIT')
+            except sqlite3.Error:
+                errors[t] += 1
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                continue
+            latencies.append((time.perf_counter() - started) * 1000.0)
+        conn.close()
+
+    return run_threads(threads, worker)
+
+
+def bench_group(db_path, threads, events, batch_ms, batch_rows, synchronous):
+    writer = AttendanceWriter(db_path, max_batch=batch_rows, max_delay=batch_ms / 1000.0,
+                              synchronous=synchronous).start()
+
+    def worker(t, latencies, errors):
+        for i in range(events):
+            started = time.perf_counter()
+            try:
+                writer.write(sample_row(t, i), timeout=30)
+            except Exception:
+                errors[t] += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000.0)
+
+    result = run_threads(threads, worker)
+    writer.close()
+    return result + (writer.stats(),)
+
+
+def report(elapsed, latencies, errors, total):
+    return {
+        'events': total,
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'events_per_sec': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'commit_ms_p50': round(percentile(latencies, 50), 3) if latencies else None,
+        'commit_ms_p99': round(percentile(latencies, 99), 3) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark group-commit vs per-row attendance writes')
+    parser.add_argument('--threads', type=int, default=32, help='concurrent handler threads')
+    parser.add_argument('--events', type=int, default=100, help='events written per thread')
+    parser.add_argument('--batch-ms', type=float, default=2.0)
+    parser.add_argument('--batch-rows', type=int, default=200)
+    parser.add_argument('--synchronous', default='FULL', choices=['NORMAL', 'FULL'],
+                        help='SQLite synchronous mode for both writers')
+    parser.add_argument('--dir', help='directory for the scratch databases (use the real data disk; '
+                                      'a tmpfs hides fsync cost)')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    total = args.threads * args.events
+    results = {}
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        for mode in ('per_row', 'group'):
+            db_path = os.path.join(tmp, f'{mode}.sqlite')
+            conn = open_write_connection(db_path)
+            conn.execute(SCHEMA)
+            conn.close()
+            if mode == 'per_row':
+                elapsed, latencies, errors = bench_per_row(db_path, args.threads, args.events, args.synchronous)
+                results[mode] = report(elapsed, latencies, errors, total)
+            else:
+                elapsed, latencies, errors, stats = bench_group(db_path, args.threads, args.events,
+                                                                args.batch_ms, args.batch_rows, args.synchronous)
+                results[mode] = report(elapsed, latencies, errors, total)
+                results[mode].update(batches=stats['batches'], avg_batch=stats['avg_batch'])
+
+    if results['per_row']['events_per_sec']:
+        results['speedup'] = round(results['group']['events_per_sec'] / results['per_row']['events_per_sec'], 2)
+
+    if args.json:
+        print(json.dumps({'threads': args.threads, 'events_per_thread': args.events,
+                          'synchronous': args.synchronous, **results}, indent=2))
+    else:
+        print(f"{args.threads} threads x {args.events} events, synchronous={args.synchronous}")
+        for mode in ('per_row', 'group'):
+            r = results[mode]
+            print(f"{mode:<8} {r['events_per_sec']:>10,.0f} events/s  p50 {r['commit_ms_p50']} ms  "
+                  f"p99 {r['commit_ms_p99']} ms  errors {r['errors']}")
+        if 'speedup' in results:
+            print(f"group commit speedup: {results['speedup']}x (avg batch {results['group']['avg_batch']})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
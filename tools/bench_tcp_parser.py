@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Parser throughput benchmark for simple_tcp_listener.py
+
+Replays a recorded message corpus through SimpleBiometricListener.parse_message,
+checks every result against the output recorded from the original
+try-every-parser implementation, and reports messages per second per format.
+
+Corpus format (JSONL, one message per line):
+  {"format": "json|xml|csv|colon|other", "message": "...", "expected": ...}
+
+Usage:
+  python3 tools/bench_tcp_parser.py
+  python3 tools/bench_tcp_parser.py --iterations 20000 --json
+  python3 tools/bench_tcp_parser.py --corpus my_corpus.jsonl
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from simple_tcp_listener import SimpleBiometricListener
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'biometric_message_corpus.jsonl')
+
+
+def load_corpus(path):
+    """Load corpus entries, preserving file order"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def check_identical(listener, corpus):
+    """Return the entries whose parse result differs from the recorded one"""
+    mismatches = []
+    for entry in corpus:
+        # Compare serialized forms: key order matters to the log, and NaN
+        # values from JSON payloads never compare equal to themselves.
+        got = json.dumps(listener.parse_message(entry['message']))
+        if got != json.dumps(entry['expected']):
+            mismatches.append({'message': entry['message'], 'expected': entry['expected'], 'got': json.loads(got)})
+    return mismatches
+
+
+def bench_format(listener, messages, iterations):
+    """Parse `iterations` messages round-robin from `messages`; return msgs/sec"""
+    parse = listener.parse_message
+    count = len(messages)
+    start = time.perf_counter()
+    for i in range(iterations):
+        parse(messages[i % count])
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed if elapsed > 0 else float('inf')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark simple_tcp_listener message parsing')
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='JSONL corpus with recorded expected results')
+    parser.add_argument('--iterations', type=int, default=10000, help='messages parsed per format')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    listener = SimpleBiometricListener()
+
+    mismatches = check_identical(listener, corpus)
+    if mismatches:
+        print(f"❌ {len(mismatches)} of {len(corpus)} messages parsed differently from the recorded results:")
+        for m in mismatches:
+            print(json.dumps(m, ensure_ascii=False))
+        return 1
+
+    by_format = {}
+    for entry in corpus:
+        by_format.setdefault(entry['format'], []).append(entry['message'])
+
+    results = {
+        fmt: {
+            'messages': len(messages),
+            'msgs_per_sec': round(bench_format(listener, messages, args.iterations)),
+        }
+        for fmt, messages in by_format.items()
+    }
+    results['all'] = {
+        'messages': len(corpus),
+        'msgs_per_sec': round(bench_format(listener, [e['message'] for e in corpus], args.iterations)),
+    }
+
+    if args.json:
+        print(json.dumps({'corpus': os.path.basename(args.corpus), 'identical': True, 'formats': results}, indent=2))
+    else:
+        print(f"✅ {len(corpus)} messages parsed identically to the recorded results")
+        print(f"{'format':<8} {'messages':>9} {'msgs/sec':>12}")
+        for fmt, r in results.items():
+            print(f"{fmt:<8} {r['messages']:>9} {r['msgs_per_sec']:>12,}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
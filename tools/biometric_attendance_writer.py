@@ -0,0 +1,156 @@
+"""
+Group-commit attendance writer for the Python biometric listener
+
+Connection handlers submit attendance events and block on the returned
+future; a single writer thread drains the queue and commits everything it
+collected in one transaction, either when `max_delay` has passed since the
+first event of the batch or when `max_batch` rows are waiting. Each future
+resolves only after its row's transaction committed, so a handler can ACK
+the device knowing the scan is durable.
+
+Rows go to biometric_events, the same table checkInService.logEvent writes.
+Building actual attendance rows needs the check-in/check-out pairing rules in
+checkInService.js, which stay in the Node app.
+"""
+
+import json
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+INSERT_EVENT_SQL = '''
+    INSERT INTO biometric_events
+        (member_id, biometric_id, event_type, device_id, timestamp, success, error_message, raw_data)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_STOP = object()
+
+
+def event_row(event_type, data):
+    """biometric_events parameters for a parsed listener message"""
+    member = data.get('member') or {}
+    user_id = data.get('userId')
+    return (
+        member.get('id'),
+        str(user_id) if user_id is not None else None,
+        event_type,
+        data.get('deviceId') or 'unknown',
+        data.get('timestamp'),
+        1,
+        None,
+        json.dumps(data, ensure_ascii=False, default=str),
+    )
+
+
+def open_write_connection(db_path, synchronous='FULL', busy_timeout_ms=5000):
+    """Autocommit connection in WAL mode, as the Node app opens the database
+
+    FULL (SQLite's default) fsyncs the WAL on
+    every commit, so a committed event survives power loss. NORMAL only
+    survives application crashes, but makes each commit much cheaper.
+    """
+    if synchronous.upper() not in ('OFF', 'NORMAL', 'FULL', 'EXTRA'):
+        raise ValueError(f"invalid synchronous mode: {synchronous}")
+    conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute(f'PRAGMA synchronous = {synchronous.upper()}')
+    conn.execute(f'PRAGMA busy_timeout = {int(busy_timeout_ms)}')
+    return conn
+
+
+class AttendanceWriter:
+    """Batches inserts from many threads into few transactions"""
+
+    def __init__(self, db_path, max_batch=200, max_delay=0.002, synchronous='FULL', sql=INSERT_EVENT_SQL):
+        self.db_path = db_path
+        self.synchronous = synchronous
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.sql = sql
+        self._queue = queue.Queue()
+        self._thread = None
+        self.batches = 0
+        self.rows = 0
+        self.failed_batches = 0
+
+    def start(self):
+        # Open on the caller's thread so a bad path fails at startup, not on the first scan
+        self._conn = open_write_connection(self.db_path, self.synchronous)
+        self._thread = threading.Thread(target=self._run, name='attendance-writer', daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, params):
+        """Queue one row; the returned Future resolves once it is committed"""
+        future = Future()
+        self._queue.put((params, future))
+        return future
+
+    def write(self, params, timeout=None):
+        """Queue one row and wait for its commit (raises if the batch failed)"""
+        return self.submit(params).result(timeout)
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def _collect(self, first):
+        """The first item plus whatever arrives before the batch closes"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Finish this batch, then let _run see the stop request
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _commit(self, batch):
+        conn = self._conn
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany(self.sql, [params for params, _ in batch])
+            conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            self.failed_batches += 1
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.rows += len(batch)
+        for _, future in batch:
+            future.set_result(True)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            self._commit(self._collect(item))
+        self._conn.close()
+
+    def close(self, timeout=5.0):
+        """Flush everything queued so far and stop the writer thread"""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'rows': self.rows,
+            'failed_batches': self.failed_batches,
+            'avg_batch': round(self.rows / self.batches, 1) if self.batches else 0.0,
+        }
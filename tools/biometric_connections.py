@@ -0,0 +1,218 @@
+"""
+Connection lifetime tracking for the Python biometric listener
+
+Every device connection is registered with a ConnectionTracker. A reaper
+thread closes connections that have been silent for `idle_timeout` seconds,
+so a half-dead ESP32 on flaky Wi-Fi stops holding a thread and a socket
+once it goes quiet. TCP keepalive (enable_keepalive) catches peers that
+vanished without a FIN even sooner, at the kernel level.
+
+Idle deadlines live in a hashed timer wheel. Readers record activity by
+writing a timestamp on their connection, no lock or reschedule; when a
+connection's slot comes round, the reaper either closes it or re-files it
+under its new deadline. A tick therefore only touches the connections
+filed in one slot, whatever the total number of connections.
+
+Closed connections feed per-device lifetime statistics (keyed by peer IP,
+which the door devices keep across reconnects).
+"""
+
+import math
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+# Longest-lived connections fall in the top bucket (a week)
+LIFETIME_BUCKETS = (1, 10, 60, 300, 1800, 3600, 6 * 3600, 86400, 7 * 86400)
+# Peers remembered for lifetime stats; the oldest is forgotten beyond this
+MAX_TRACKED_DEVICES = 4096
+
+
+def enable_keepalive(sock, idle=60, interval=10, count=5):
+    """Turn on TCP keepalive so the kernel drops a peer that stopped answering
+
+    A dead peer is noticed after roughly idle + interval * count seconds.
+    Options a platform lacks are skipped.
+    """
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    if hasattr(socket, 'SIO_KEEPALIVE_VALS'):
+        # Windows: (on, idle ms, interval ms); the probe count is fixed by the OS
+        sock.ioctl(socket.SIO_KEEPALIVE_VALS, (1, int(idle * 1000), int(interval * 1000)))
+        return
+    idle_option = getattr(socket, 'TCP_KEEPIDLE', None) or getattr(socket, 'TCP_KEEPALIVE', None)
+    for option, value in ((idle_option, idle),
+                          (getattr(socket, 'TCP_KEEPINTVL', None), interval),
+                          (getattr(socket, 'TCP_KEEPCNT', None), count)):
+        if option is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, option, int(value))
+
+
+class TimerWheel:
+    """Hashed timer wheel: O(1) schedule/cancel, one slot visited per tick
+
+    A deadline is filed in slot (tick number % slots). Deadlines more than
+    one revolution away share a slot with nearer ones and simply stay put
+    until their own revolution comes round.
+    """
+
+    def __init__(self, tick=1.0, slots=512, now=None):
+        self.tick = tick
+        self._slots = [dict() for _ in range(slots)]
+        self._where = {}  # key -> (slot index, tick number)
+        self._current = self._tick_number(time.monotonic() if now is None else now)
+
+    def _tick_number(self, when):
+        return math.floor(when / self.tick)
+
+    def __len__(self):
+        return len(self._where)
+
+    def schedule(self, key, deadline):
+        """(Re)file `key` to expire at `deadline`"""
+        self.cancel(key)
+        # Never file into a slot the wheel has already passed
+        number = max(math.ceil(deadline / self.tick), self._current + 1)
+        index = number % len(self._slots)
+        self._slots[index][key] = number
+        self._where[key] = (index, number)
+
+    def cancel(self, key):
+        entry = self._where.pop(key, None)
+        if entry is not None:
+            del self._slots[entry[0]][key]
+
+    def advance(self, now):
+        """Keys whose deadline passed, visiting each slot up to `now` once"""
+        expired = []
+        target = self._tick_number(now)
+        # After a long stall one full revolution covers every slot
+        start = max(self._current + 1, target - len(self._slots) + 1)
+        for number in range(start, target + 1):
+            slot = self._slots[number % len(self._slots)]
+            due = [key for key, key_number in slot.items() if key_number <= target]
+            for key in due:
+                del slot[key]
+                del self._where[key]
+            expired.extend(due)
+        self._current = max(self._current, target)
+        return expired
+
+
+class TrackedConnection:
+    """One device connection; readers bump `last_activity` on every recv"""
+
+    __slots__ = ('sock', 'peer', 'opened_at', 'last_activity', 'messages', 'close_reason')
+
+    def __init__(self, sock, peer, now):
+        self.sock = sock
+        self.peer = peer
+        self.opened_at = now
+        self.last_activity = now
+        self.messages = 0
+        self.close_reason = None
+
+
+class DeviceLifetimes:
+    """Per-peer tallies of finished connections"""
+
+    __slots__ = ('connections', 'total_s', 'min_s', 'max_s', 'messages', 'reasons')
+
+    def __init__(self):
+        self.connections = 0
+        self.total_s = 0.0
+        self.min_s = None
+        self.max_s = 0.0
+        self.messages = 0
+        self.reasons = {}
+
+    def as_dict(self):
+        return {
+            'connections': self.connections,
+            'avg_lifetime_s': round(self.total_s / self.connections, 1) if self.connections else 0.0,
+            'min_lifetime_s': round(self.min_s or 0.0, 1),
+            'max_lifetime_s': round(self.max_s, 1),
+            'messages': self.messages,
+            'close_reasons': dict(self.reasons),
+        }
+
+
+class ConnectionTracker:
+    """Idle expiry and lifetime statistics for the listener's connections"""
+
+    def __init__(self, idle_timeout=3600.0, tick=1.0, slots=512):
+        self.idle_timeout = idle_timeout
+        self.tick = tick
+        self._wheel = TimerWheel(tick, slots)
+        self._lock = threading.Lock()
+        self._devices = OrderedDict()
+        self._stop = threading.Event()
+        self._thread = None
+        self.idle_closed = 0
+
+    def start(self):
+        if self.idle_timeout > 0:
+            self._thread = threading.Thread(target=self._run, name='idle-reaper', daemon=True)
+            self._thread.start()
+        return self
+
+    def open(self, sock, peer):
+        conn = TrackedConnection(sock, peer, time.monotonic())
+        if self.idle_timeout > 0:
+            with self._lock:
+                self._wheel.schedule(conn, conn.opened_at + self.idle_timeout)
+        return conn
+
+    def close(self, conn, reason='closed'):
+        """Forget `conn` and fold it into its device's stats; returns (lifetime, reason)"""
+        now = time.monotonic()
+        lifetime = now - conn.opened_at
+        # An idle or shutdown close decided elsewhere wins over the reader's EOF
+        reason = conn.close_reason or reason
+        host = conn.peer[0] if isinstance(conn.peer, tuple) else str(conn.peer)
+        with self._lock:
+            self._wheel.cancel(conn)
+            stats = self._devices.pop(host, None) or DeviceLifetimes()
+            self._devices[host] = stats
+            if len(self._devices) > MAX_TRACKED_DEVICES:
+                self._devices.popitem(last=False)
+            stats.connections += 1
+            stats.total_s += lifetime
+            stats.min_s = lifetime if stats.min_s is None else min(stats.min_s, lifetime)
+            stats.max_s = max(stats.max_s, lifetime)
+            stats.messages += conn.messages
+            stats.reasons[reason] = stats.reasons.get(reason, 0) + 1
+        return lifetime, reason
+
+    def reap(self, now=None):
+        """Shut down connections idle past the timeout; returns them"""
+        now = time.monotonic() if now is None else now
+        reaped = []
+        with self._lock:
+            for conn in self._wheel.advance(now):
+                deadline = conn.last_activity + self.idle_timeout
+                if deadline > now:
+                    self._wheel.schedule(conn, deadline)
+                else:
+                    conn.close_reason = 'idle'
+                    reaped.append(conn)
+        for conn in reaped:
+            self.idle_closed += 1
+            try:
+                # The reader's recv() returns EOF and it cleans up as for a normal close
+                conn.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        return reaped
+
+    def _run(self):
+        while not self._stop.wait(self.tick):
+            self.reap()
+
+    def stop(self):
+        self._stop.set()
+
+    def device_stats(self):
+        """peer host -> lifetime summary of its closed connections"""
+        with self._lock:
+            return {host: stats.as_dict() for host, stats in self._devices.items()}
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Device-swarm load generator for the biometric TCP listener
+
+Simulates N ESP32 devices, each holding one TCP connection and sending scans
+at a share of the target rate. Every message is newline-terminated and each
+device waits for the ACK lines of its last write before sending the next one,
+the same send-then-wait-for-ACK loop the firmware uses. Optional split writes
+(one message sent in two segments), pipelining (several messages in one
+write) and multi-line JSON/XML documents (pretty-printed, one message
+spanning several lines) exercise the server's framing. A multi-line
+document answered with ACK:UNKNOWN or ACK:ERROR counts as a framing error:
+the server split it into pieces.
+
+Results are written as JSON so runs against different server modes can be
+compared side by side (use --label to tag them).
+
+Usage:
+  python3 tools/simple_tcp_listener.py 5005 &
+  python3 tools/biometric_load_generator.py --devices 50 --rate 500 --duration 30
+  python3 tools/biometric_load_generator.py --mix json=1 --pipeline 4 --split-fraction 0.2 \\
+      --label threaded --output load_threaded.json
+  python3 tools/biometric_load_generator.py --mix json=1,xml=1 --multiline-fraction 0.3 --split-fraction 0.2
+"""
+
+import argparse
+import json
+import random
+import socket
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+FORMATS = ('json', 'xml', 'csv', 'colon')
+STATUSES = ('authorized', 'authorized', 'authorized', 'unauthorized', 'clock_in', 'clock_out')
+
+
+def build_message(fmt, device_id, user_id, status, multiline=False):
+    """One scan in the given wire format, as the listener expects it
+
+    `multiline` pretty-prints JSON and spreads XML over several lines.
+    """
+    timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    if fmt == 'json':
+        # Same fields as sendBiometricData() in the door-lock firmware
+        return json.dumps({
+            'userId': str(user_id), 'memberId': str(user_id), 'timestamp': timestamp,
+            'status': status, 'deviceId': device_id, 'event': 'TimeLog', 'verifMode': 'FP',
+            'deviceType': 'esp32_door_lock', 'location': 'main_entrance',
+        }, **({'indent': 2} if multiline else {'separators': (',', ':')}))
+    if fmt == 'xml' and multiline:
+        return (f'<?xml version="1.0"?>\n<event>\n  <userId>{user_id}</userId>\n'
+                f'  <status>{status}</status>\n  <deviceId>{device_id}</deviceId>\n'
+                f'  <timestamp>{timestamp}</timestamp>\n</event>')
+    if fmt == 'xml':
+        return (f"<event><userId>{user_id}</userId><status>{status}</status>"
+                f"<deviceId>{device_id}</deviceId><timestamp>{timestamp}</timestamp></event>")
+    if fmt == 'csv':
+        return f"{user_id},{timestamp},{status},{device_id}"
+    return f"ACCESS:{user_id}:{status}:{device_id}"
+
+
+def parse_mix(spec):
+    """'json=60,xml=20,csv=10,colon=10' -> (formats, weights)"""
+    weights = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip().lower()
+        if name not in FORMATS:
+            raise argparse.ArgumentTypeError(f"unknown format '{name}' (expected one of {', '.join(FORMATS)})")
+        weights[name] = float(weight or 1)
+    if not any(weights.values()):
+        raise argparse.ArgumentTypeError('mix needs at least one non-zero weight')
+    return tuple(weights), tuple(weights.values())
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class DeviceStats:
+    """Per-device tallies, merged after the run (no locking on the hot path)"""
+
+    def __init__(self):
+        self.sent = 0
+        self.acked = 0
+        self.rtts = []
+        self.rtts_by_format = {fmt: [] for fmt in FORMATS}
+        self.sent_by_format = dict.fromkeys(FORMATS, 0)
+        self.acks = {}
+        self.errors = {'connect': 0, 'send': 0, 'timeout': 0, 'closed': 0, 'ack_error': 0, 'framing': 0}
+        self.reconnects = 0
+
+
+class SimulatedDevice(threading.Thread):
+    def __init__(self, index, args, start_barrier):
+        super().__init__(name=f"device-{index}", daemon=True)
+        self.device_id = f"LOADGEN_{index:04d}"
+        self.args = args
+        self.deadline = 0.0  # set by run() just before the start barrier opens
+        self.start_barrier = start_barrier
+        self.rng = random.Random(args.seed + index)
+        self.stats = DeviceStats()
+        self.sock = None
+        self.buffer = b''
+
+    def connect(self):
+        self.close()
+        try:
+            self.sock = socket.create_connection((self.args.host, self.args.port), timeout=self.args.timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.buffer = b''
+            return True
+        except OSError:
+            self.stats.errors['connect'] += 1
+            self.sock = None
+            return False
+
+    def close(self):
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+    def send_burst(self, payload):
+        """Write the burst, optionally as two segments with a pause between"""
+        if self.rng.random() < self.args.split_fraction and len(payload) > 1:
+            cut = self.rng.randrange(1, len(payload))
+            self.sock.sendall(payload[:cut])
+            time.sleep(self.args.split_delay / 1000.0)
+            self.sock.sendall(payload[cut:])
+        else:
+            self.sock.sendall(payload)
+
+    def read_ack(self, timeout_at):
+        """Return the next ACK line, or None on timeout / close"""
+        while b'\r\n' not in self.buffer:
+            remaining = timeout_at - time.perf_counter()
+            if remaining <= 0:
+                self.stats.errors['timeout'] += 1
+                return None
+            self.sock.settimeout(remaining)
+            try:
+                chunk = self.sock.recv(4096)
+            except socket.timeout:
+                self.stats.errors['timeout'] += 1
+                return None
+            except OSError:
+                self.stats.errors['closed'] += 1
+                return None
+            if not chunk:
+                self.stats.errors['closed'] += 1
+                return None
+            self.buffer += chunk
+        line, self.buffer = self.buffer.split(b'\r\n', 1)
+        return line.decode('utf-8', 'replace')
+
+    def run(self):
+        args, stats, rng = self.args, self.stats, self.rng
+        formats, weights = args.mix
+        # Each device sends its share of the target rate, one burst at a time
+        interval = args.devices * args.pipeline / args.rate if args.rate else 0.0
+        self.start_barrier.wait()
+        # Stagger the first send so devices don't fire in lockstep
+        next_send = time.perf_counter() + rng.random() * interval
+
+        while time.perf_counter() < self.deadline:
+            if self.sock is None and not self.connect():
+                time.sleep(0.1)
+                continue
+            if interval:
+                delay = next_send - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                next_send = max(next_send + interval, time.perf_counter() - interval)
+
+            burst = rng.choices(formats, weights, k=args.pipeline)
+            multiline = [fmt in ('json', 'xml') and rng.random() < args.multiline_fraction for fmt in burst]
+            payload = ''.join(
+                build_message(fmt, self.device_id, rng.randint(1, args.members), rng.choice(STATUSES),
+                              multi) + '\n'
+                for fmt, multi in zip(burst, multiline)
+            ).encode('utf-8')
+            try:
+                sent_at = time.perf_counter()
+                self.send_burst(payload)
+            except OSError:
+                stats.errors['send'] += 1
+                stats.reconnects += 1
+                self.close()
+                continue
+            stats.sent += len(burst)
+            for fmt in burst:
+                stats.sent_by_format[fmt] += 1
+
+            timeout_at = sent_at + args.timeout
+            for fmt, multi in zip(burst, multiline):
+                ack = self.read_ack(timeout_at)
+                if ack is None:
+                    # Any late ACKs would be misattributed; start a fresh connection
+                    stats.reconnects += 1
+                    self.close()
+                    break
+                rtt_ms = (time.perf_counter() - sent_at) * 1000.0
+                stats.acked += 1
+                stats.rtts.append(rtt_ms)
+                stats.rtts_by_format[fmt].append(rtt_ms)
+                stats.acks[ack] = stats.acks.get(ack, 0) + 1
+                if multi and ack in ('ACK:UNKNOWN', 'ACK:ERROR'):
+                    stats.errors['framing'] += 1
+                elif ack == 'ACK:ERROR':
+                    stats.errors['ack_error'] += 1
+        self.close()
+
+
+def summarize(rtts):
+    rtts = sorted(rtts)
+    if not rtts:
+        return {'count': 0}
+    return {
+        'count': len(rtts),
+        'p50': round(percentile(rtts, 50), 3),
+        'p90': round(percentile(rtts, 90), 3),
+        'p99': round(percentile(rtts, 99), 3),
+        'max': round(rtts[-1], 3),
+        'mean': round(sum(rtts) / len(rtts), 3),
+    }
+
+
+def run(args):
+    start_barrier = threading.Barrier(args.devices + 1)
+    devices = [SimulatedDevice(i, args, start_barrier) for i in range(args.devices)]
+    for device in devices:
+        device.start()
+    # Devices read their deadline only after the barrier releases them
+    started = time.perf_counter()
+    for device in devices:
+        device.deadline = started + args.duration
+    start_barrier.wait()
+    for device in devices:
+        device.join(args.duration + args.timeout + 5)
+    elapsed = time.perf_counter() - started
+
+    total = DeviceStats()
+    for device in devices:
+        s = device.stats
+        total.sent += s.sent
+        total.acked += s.acked
+        total.rtts.extend(s.rtts)
+        total.reconnects += s.reconnects
+        for fmt in FORMATS:
+            total.sent_by_format[fmt] += s.sent_by_format[fmt]
+            total.rtts_by_format[fmt].extend(s.rtts_by_format[fmt])
+        for ack, count in s.acks.items():
+            total.acks[ack] = total.acks.get(ack, 0) + count
+        for kind, count in s.errors.items():
+            total.errors[kind] += count
+
+    missing_acks = total.sent - total.acked
+    failed = missing_acks + total.errors['ack_error'] + total.errors['framing']
+    return {
+        'label': args.label,
+        'target': f"{args.host}:{args.port}",
+        'config': {
+            'devices': args.devices,
+            'target_rate': args.rate,
+            'duration_s': args.duration,
+            'mix': dict(zip(*args.mix)),
+            'pipeline': args.pipeline,
+            'split_fraction': args.split_fraction,
+            'split_delay_ms': args.split_delay,
+            'multiline_fraction': args.multiline_fraction,
+            'timeout_s': args.timeout,
+        },
+        'elapsed_s': round(elapsed, 3),
+        'messages_sent': total.sent,
+        'acks_received': total.acked,
+        'throughput_msgs_per_sec': round(total.acked / elapsed, 1) if elapsed else 0.0,
+        'error_rate': round(failed / total.sent, 5) if total.sent else 0.0,
+        'missing_acks': missing_acks,
+        'errors': total.errors,
+        'reconnects': total.reconnects,
+        'ack_rtt_ms': summarize(total.rtts),
+        'ack_rtt_ms_by_format': {
+            fmt: summarize(total.rtts_by_format[fmt]) for fmt in FORMATS if total.sent_by_format[fmt]
+        },
+        'sent_by_format': {fmt: n for fmt, n in total.sent_by_format.items() if n},
+        'acks': dict(sorted(total.acks.items())),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate a swarm of ESP32 devices against the biometric listener')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5005)
+    parser.add_argument('--devices', type=int, default=10, help='concurrent simulated devices (connections)')
+    parser.add_argument('--rate', type=float, default=100.0,
+                        help='target messages/sec across all devices (0 = as fast as ACKs allow)')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds to run')
+    parser.add_argument('--mix', type=parse_mix, default='json=70,xml=10,csv=10,colon=10',
+                        help='weighted message format mix, e.g. json=70,xml=10,csv=10,colon=10')
+    parser.add_argument('--pipeline', type=int, default=1, help='messages per write before waiting for ACKs')
+    parser.add_argument('--split-fraction', type=float, default=0.0,
+                        help='fraction of writes sent as two TCP segments')
+    parser.add_argument('--split-delay', type=float, default=5.0, help='ms between the two segments of a split write')
+    parser.add_argument('--multiline-fraction', type=float, default=0.0,
+                        help='fraction of JSON/XML messages sent pretty-printed over several lines')
+    parser.add_argument('--timeout', type=float, default=5.0, help='seconds to wait for the ACKs of a write')
+    parser.add_argument('--members', type=int, default=500, help='size of the simulated userId pool')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--label', default='', help='free-form tag for the server mode under test')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    args = parser.parse_args()
+    if isinstance(args.mix, str):
+        args.mix = parse_mix(args.mix)
+    if args.devices < 1 or args.pipeline < 1:
+        parser.error('--devices and --pipeline must be at least 1')
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f"📊 {report['acks_received']}/{report['messages_sent']} acked, "
+              f"{report['throughput_msgs_per_sec']} msg/s, p99 {report['ack_rtt_ms'].get('p99')} ms -> {args.output}")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Indexed queries over biometric_access.log
+
+`compact` turns the part of the JSONL log written since the last run into
+an immutable segment file; `query` answers user / device / event type /
+time range questions from the segments without scanning the log. Only the
+still-open tail (lines appended after the last compaction) is read
+linearly, so run compact periodically (e.g. nightly).
+
+Segment layout (little-endian, every section 8-byte aligned, opened with
+mmap so a query only pages in what it reads):
+
+  header      magic, version, record count, section directory
+  ts          float64 epoch seconds per record, sorted ascending
+  user/device/event
+              uint32 dictionary id per record (column)
+  <col>.soff  uint64 offsets of the dictionary strings, sorted, in <col>.str
+  <col>.pidx  uint64 start of each dictionary id's rows in <col>.post
+  <col>.post  uint32 row numbers per dictionary id (the value -> rows index),
+              ascending, i.e. in time order
+  poff        uint64 offsets of each record's original JSON line in payload
+
+A query binary-searches the time range in `ts`, takes the shortest posting
+list among its filters (clipped to that range by binary search) and checks
+the other filters against the columns for just those rows. Segments whose
+time span misses the range are never opened.
+
+Usage:
+  python3 tools/biometric_log_index.py compact
+  python3 tools/biometric_log_index.py query --user 42 --since 2026-10-13 --until 2026-10-14
+  python3 tools/biometric_log_index.py query --device DOOR_1 --event ACCESS_DENIED --count
+  python3 tools/biometric_log_index.py stats
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+
+DEFAULT_LOG = os.path.join(tempfile.gettempdir(), 'biometric_access.log')
+
+MAGIC = b'BLIX'
+VERSION = 1
+# magic, version, reserved, record count, section count
+_HEADER = struct.Struct('<4sHHQQ')
+# section name, offset, length in bytes
+_SECTION = struct.Struct('<16sQQ')
+
+COLUMNS = ('user', 'device', 'event')
+MAX_SEGMENT_RECORDS = 1_000_000
+
+
+def _parse_time(value):
+    """Epoch seconds from an ISO date/datetime string (local time like the log)"""
+    return datetime.fromisoformat(value).timestamp()
+
+
+def _record_fields(record):
+    """(ts, user, device, event) of a log record, or None if it has no usable timestamp"""
+    try:
+        ts = _parse_time(record['timestamp'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    data = record.get('data') if isinstance(record.get('data'), dict) else {}
+    user = data.get('userId')
+    device = data.get('deviceId')
+    return (ts, '' if user is None else str(user), '' if device is None else str(device),
+            str(record.get('event_type') or ''))
+
+
+def _le(values):
+    """array bytes in little-endian order"""
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_segment(path, rows):
+    """Write one segment from (ts, user, device, event, line bytes) tuples"""
+    rows = sorted(rows, key=lambda row: row[0])
+    sections = [('ts', _le(array('d', (row[0] for row in rows))))]
+
+    for position, name in enumerate(COLUMNS, start=1):
+        values = sorted({row[position] for row in rows})
+        ids = {value: i for i, value in enumerate(values)}
+        column = array('I', (ids[row[position]] for row in rows))
+        postings = [[] for _ in values]
+        for row_number, value_id in enumerate(column):
+            postings[value_id].append(row_number)
+
+        encoded = [value.encode('utf-8') for value in values]
+        string_offsets = array('Q', [0])
+        post_index = array('Q', [0])
+        post = array('I')
+        for value_bytes, rows_for_value in zip(encoded, postings):
+            string_offsets.append(string_offsets[-1] + len(value_bytes))
+            post.extend(rows_for_value)
+            post_index.append(len(post))
+        sections += [
+            (name, _le(column)),
+            (f'{name}.soff', _le(string_offsets)),
+            (f'{name}.str', b''.join(encoded)),
+            (f'{name}.pidx', _le(post_index)),
+            (f'{name}.post', _le(post)),
+        ]
+
+    payload_offsets = array('Q', [0])
+    for row in rows:
+        payload_offsets.append(payload_offsets[-1] + len(row[4]))
+    sections += [('poff', _le(payload_offsets)), ('payload', b''.join(row[4] for row in rows))]
+
+    directory_size = _HEADER.size + _SECTION.size * len(sections)
+    offset = -(-directory_size // 8) * 8
+    layout = []
+    for name, blob in sections:
+        layout.append((name, offset, blob))
+        offset = -(-(offset + len(blob)) // 8) * 8
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, 0, len(rows), len(sections)))
+        for name, section_offset, blob in layout:
+            f.write(_SECTION.pack(name.encode('ascii'), section_offset, len(blob)))
+        for name, section_offset, blob in layout:
+            f.write(b'\0' * (section_offset - f.tell()))
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    # Readers never see a half-written segment
+    os.replace(tmp_path, path)
+    return len(rows)
+
+
+class LogSegment:
+    """Read-only, memory-mapped view of one segment file"""
+
+    def __init__(self, path):
+        if sys.byteorder != 'little':
+            raise OSError('segments are little-endian; big-endian hosts are not supported')
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.count, section_count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} log segment")
+        view = self._view = memoryview(self._mm)
+        self._sections = {}
+        for i in range(section_count):
+            name, offset, length = _SECTION.unpack_from(self._mm, _HEADER.size + i * _SECTION.size)
+            self._sections[name.rstrip(b'\0').decode('ascii')] = view[offset:offset + length]
+        self.ts = self._array('ts', 'd')
+        self.poff = self._array('poff', 'Q')
+        self.payload = self._sections['payload']
+
+    def _array(self, name, fmt):
+        return self._sections[name].cast(fmt)
+
+    def close(self):
+        # memoryviews over the map must be released before it can close
+        self.ts = self.poff = self.payload = None
+        for section in self._sections.values():
+            section.release()
+        self._sections.clear()
+        self._view.release()
+        self._mm.close()
+
+    def value_id(self, column, value):
+        """Dictionary id of `value` in `column`, or None (binary search over the strings)"""
+        offsets = self._array(f'{column}.soff', 'Q')
+        strings = self._sections[f'{column}.str']
+        target = value.encode('utf-8')
+        lo, hi = 0, len(offsets) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if bytes(strings[offsets[mid]:offsets[mid + 1]]) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(offsets) - 1 and bytes(strings[offsets[lo]:offsets[lo + 1]]) == target:
+            return lo
+        return None
+
+    def postings(self, column, value_id):
+        index = self._array(f'{column}.pidx', 'Q')
+        return self._array(f'{column}.post', 'I')[index[value_id]:index[value_id + 1]]
+
+    def record(self, row):
+        return bytes(self.payload[self.poff[row]:self.poff[row + 1]])
+
+    def query(self, filters, since=None, until=None):
+        """Row numbers (in time order) matching `filters` {column: value} within [since, until)"""
+        lo = 0 if since is None else bisect_left(self.ts, since)
+        hi = self.count if until is None else bisect_left(self.ts, until)
+        if lo >= hi:
+            return []
+        wanted = {}
+        for column, value in filters.items():
+            value_id = self.value_id(column, value)
+            if value_id is None:
+                return []
+            wanted[column] = value_id
+        if not wanted:
+            return range(lo, hi)
+
+        # Walk the shortest posting list, clipped to the time range
+        driver = min(wanted, key=lambda column: len(self.postings(column, wanted[column])))
+        rows = self.postings(driver, wanted.pop(driver))
+        rows = rows[bisect_left(rows, lo):bisect_left(rows, hi)]
+        checks = [(self._array(column, 'I'), value_id) for column, value_id in wanted.items()]
+        return [row for row in rows if all(column[row] == value_id for column, value_id in checks)]
+
+
+class LogIndex:
+    """Segments of one log plus the manifest that tracks what was compacted"""
+
+    def __init__(self, log_path=DEFAULT_LOG, index_dir=None):
+        self.log_path = log_path
+        self.index_dir = index_dir or log_path + '.idx'
+        self.manifest_path = os.path.join(self.index_dir, 'manifest.json')
+        self.manifest = {'source': os.path.abspath(log_path), 'inode': None, 'offset': 0, 'segments': []}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _tail_start(self):
+        """Offset of the first uncompacted byte of the log (0 after a rotation)"""
+        try:
+            st = os.stat(self.log_path)
+        except FileNotFoundError:
+            return None
+        if self.manifest['inode'] != st.st_ino or st.st_size < self.manifest['offset']:
+            return 0
+        return self.manifest['offset']
+
+    def _read_tail(self, start):
+        """Yield (end offset, line) for each complete line from `start`"""
+        with open(self.log_path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b'\n'):
+                    return  # still being written
+                offset += len(line)
+                yield offset, line
+
+    def compact(self, max_records=MAX_SEGMENT_RECORDS):
+        """Move complete lines appended since the last run into new segments"""
+        start = self._tail_start()
+        if start is None:
+            raise FileNotFoundError(f"log not found: {self.log_path}")
+        os.makedirs(self.index_dir, exist_ok=True)
+        inode = os.stat(self.log_path).st_ino
+        stats = {'segments': 0, 'records': 0, 'skipped': 0}
+        rows = []
+        end = start
+
+        def flush(segment_end):
+            number = len(self.manifest['segments']) + 1
+            name = f"segment-{number:06d}.bli"
+            write_segment(os.path.join(self.index_dir, name), rows)
+            self.manifest['segments'].append({
+                'file': name, 'records': len(rows),
+                'min_ts': min(row[0] for row in rows), 'max_ts': max(row[0] for row in rows),
+                'source_inode': inode, 'source_start': start_of_segment, 'source_end': segment_end,
+            })
+            self.manifest.update(inode=inode, offset=segment_end)
+            self._save_manifest()
+            stats['segments'] += 1
+            stats['records'] += len(rows)
+
+        start_of_segment = start
+        for end, line in self._read_tail(start):
+            try:
+                fields = _record_fields(json.loads(line))
+            except ValueError:
+                fields = None
+            if fields is None:
+                stats['skipped'] += 1
+                continue
+            rows.append(fields + (line.rstrip(b'\r\n'),))
+            if len(rows) >= max_records:
+                flush(end)
+                rows, start_of_segment = [], end
+        if rows:
+            flush(end)
+        elif end != self.manifest['offset'] or inode != self.manifest['inode']:
+            # Only skipped lines (or none): still move past them
+            self.manifest.update(inode=inode, offset=end)
+            self._save_manifest()
+        return stats
+
+    def query(self, user=None, device=None, event=None, since=None, until=None, include_tail=True):
+        """Yield matching records' JSON lines (bytes): segments first, then the open tail"""
+        filters = {column: value for column, value in zip(COLUMNS, (user, device, event)) if value is not None}
+        for entry in self.manifest['segments']:
+            if (since is not None and entry['max_ts'] < since) or (until is not None and entry['min_ts'] >= until):
+                continue
+            segment = LogSegment(os.path.join(self.index_dir, entry['file']))
+            try:
+                for row in segment.query(filters, since, until):
+                    yield segment.record(row)
+            finally:
+                segment.close()
+
+        start = self._tail_start() if include_tail else None
+        if start is None:
+            return
+        for _, line in self._read_tail(start):
+            try:
+                fields = _record_fields(json.loads(line))
+            except ValueError:
+                continue
+            if fields is None:
+                continue
+            ts, *values = fields
+            if since is not None and ts < since or until is not None and ts >= until:
+                continue
+            if all(values[COLUMNS.index(column)] == value for column, value in filters.items()):
+                yield line.rstrip(b'\r\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compact and query the biometric access log')
+    parser.add_argument('--log', default=DEFAULT_LOG, help=f"JSONL event log (default {DEFAULT_LOG})")
+    parser.add_argument('--index-dir', help='where segments live (default: <log>.idx)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    compact = commands.add_parser('compact', help='index lines appended since the last compaction')
+    compact.add_argument('--max-records', type=int, default=MAX_SEGMENT_RECORDS, help='records per segment')
+
+    query = commands.add_parser('query', help='print matching records as JSONL')
+    query.add_argument('--user', help='userId')
+    query.add_argument('--device', help='deviceId')
+    query.add_argument('--event', help='event type, e.g. ACCESS_DENIED')
+    query.add_argument('--since', help='ISO date/time, inclusive (local time)')
+    query.add_argument('--until', help='ISO date/time, exclusive (local time)')
+    query.add_argument('--no-tail', action='store_true', help='skip lines not compacted yet')
+    query.add_argument('--count', action='store_true', help='print only the number of matches')
+    query.add_argument('--limit', type=int, default=0)
+
+    commands.add_parser('stats', help='show segments and the uncompacted tail')
+    args = parser.parse_args()
+
+    index = LogIndex(args.log, args.index_dir)
+    if args.command == 'compact':
+        started = time.perf_counter()
+        try:
+            stats = index.compact(args.max_records)
+        except FileNotFoundError as e:
+            parser.error(str(e))
+        print(f"🗜️  {stats['records']:,} records into {stats['segments']} segments "
+              f"({stats['skipped']} unreadable lines skipped) in {time.perf_counter() - started:.2f} s")
+        return 0
+
+    if args.command == 'stats':
+        segments = index.manifest['segments']
+        print(json.dumps({
+            'log': index.log_path, 'index_dir': index.index_dir,
+            'segments': len(segments), 'records': sum(entry['records'] for entry in segments),
+            'compacted_offset': index.manifest['offset'],
+            'tail_bytes': max(0, os.path.getsize(index.log_path) - (index._tail_start() or 0))
+            if os.path.exists(index.log_path) else 0,
+        }, indent=2))
+        return 0
+
+    try:
+        since = _parse_time(args.since) if args.since else None
+        until = _parse_time(args.until) if args.until else None
+    except ValueError as e:
+        parser.error(f"bad --since/--until: {e}")
+    matches = 0
+    out = sys.stdout.buffer
+    for line in index.query(args.user, args.device, args.event, since, until, include_tail=not args.no_tail):
+        matches += 1
+        if not args.count:
+            out.write(line + b'\n')
+        if args.limit and matches >= args.limit:
+            break
+    if args.count:
+        print(matches)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
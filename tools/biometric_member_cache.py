@@ -0,0 +1,314 @@
+"""
+Cached member / membership lookups for the Python biometric listener
+
+Resolves a device's biometric user ID to a gym member and their plan status
+against the app's SQLite database, opened read-only through a small
+connection pool. An in-memory LRU sits in front of it so an access decision
+at peak entry time is a dict lookup rather than a query.
+
+Staleness is bounded cheaply: at most every `revalidate_interval` seconds a
+dedicated connection reads `PRAGMA data_version`, which changes whenever
+another connection commits. Most commits at peak are attendance events
+(the listener's own group-commit writer, other workers, the Node app's
+check-ins), which don't touch anything cached, so a version change is only
+a hint: the cache then compares a fingerprint of the rows it depends on
+(members, membership_plans, payments, invoices and the grace setting) and
+only a changed fingerprint clears the cache and re-warms it in bulk in the
+background. Plan expiry is evaluated at lookup time from the cached due
+date, so the passage of days never needs a reload.
+
+The active-plan rule mirrors BiometricIntegration.hasActivePlan: the member
+needs a plan; if the plan has a duration, the due date is the last payment
+(or join date) plus duration_days, and access ends once it is more than
+`payment_grace_period_days` overdue.
+"""
+
+import os
+import queue
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+MemberRecord = namedtuple('MemberRecord', [
+    'member_id', 'name', 'biometric_id', 'is_active', 'has_plan', 'due_date', 'grace_days',
+])
+MemberRecord.__doc__ = 'Cached member row plus what is needed to judge plan status'
+
+# Cached "no member enrolled with this ID" so unknown fingers stay cheap too
+_MISSING = object()
+
+_LEADING_INT = re.compile(r'\s*([+-]?\d+)')
+_DATE_ONLY = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+_MEMBER_SELECT = '''
+    SELECT m.id, m.name, m.biometric_id, m.is_active, m.join_date,
+           mp.id IS NOT NULL AS has_plan, mp.duration_days, lp.last_payment_date
+    FROM members m
+    LEFT JOIN membership_plans mp ON mp.id = m.membership_plan_id
+    LEFT JOIN (
+        SELECT i.member_id, MAX(p.payment_date) AS last_payment_date
+        FROM payments p JOIN invoices i ON p.invoice_id = i.id
+        GROUP BY i.member_id
+    ) lp ON lp.member_id = m.id
+'''
+
+
+# What the cached records are built from. Member and plan rows are compared
+# column by column (a gym has thousands, so this is a few ms at most);
+# payments and invoices only grow in practice and are compared by count and
+# highest rowid. Columns the records don't use (last_visit, ...) are left
+# out so their updates don't invalidate anything.
+_FINGERPRINT_SELECT = '''
+    SELECT (SELECT group_concat(id || '|' || ifnull(name, '') || '|' || ifnull(biometric_id, '') || '|'
+                                || ifnull(is_active, '') || '|' || ifnull(membership_plan_id, '') || '|'
+                                || ifnull(join_date, ''), ';') FROM members),
+           (SELECT group_concat(id || '|' || ifnull(duration_days, ''), ';') FROM membership_plans),
+           (SELECT count(*) || '|' || ifnull(max(rowid), '') FROM payments),
+           (SELECT count(*) || '|' || ifnull(max(rowid), '') FROM invoices),
+           (SELECT value FROM settings WHERE key = 'payment_grace_period_days')
+'''
+
+
+def default_database_path():
+    """The app's database location, resolved the same way as src/config/sqlite.js"""
+    data_root = os.environ.get('WIN_DATA_ROOT')
+    if not data_root:
+        if sys.platform == 'win32':
+            data_root = os.path.join(os.environ.get('ProgramData', 'C:/ProgramData'), 'gmgmt')
+        else:
+            data_root = os.path.join(os.getcwd(), 'data')
+    return os.path.join(data_root, 'data', 'gmgmt.sqlite')
+
+
+def normalize_biometric_id(value):
+    """Match findMemberByBiometricId: "5", " 5", "5.0" and 5 all become "5"
+
+    Returns None when the value has no leading integer (parseInt -> NaN).
+    """
+    if value is None:
+        return None
+    match = _LEADING_INT.match(str(value))
+    return str(int(match.group(1))) if match else None
+
+
+def _parse_date(value):
+    if not value:
+        return None
+    text = str(value).strip()
+    try:
+        parsed = datetime.fromisoformat(text.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if _DATE_ONLY.fullmatch(text):
+        # new Date('YYYY-MM-DD') is UTC midnight (join_date is stored like that)
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    # Compare in local time like the JS Date arithmetic does
+    return parsed.astimezone().replace(tzinfo=None) if parsed.tzinfo else parsed
+
+
+def plan_is_active(record, now=None):
+    """Whether a member's plan still allows entry (see module docstring)"""
+    if not record.has_plan:
+        return False
+    if record.due_date is None:
+        # Plan without a duration, or unparseable dates: hasActivePlan allows it
+        return True
+    days_since_due = (((now or datetime.now()) - record.due_date).total_seconds()) // 86400
+    return days_since_due <= record.grace_days
+
+
+class ReadOnlyConnectionPool:
+    """Fixed set of read-only SQLite connections shared across handler threads"""
+
+    def __init__(self, db_path, size=4):
+        self.db_path = db_path
+        self._connections = queue.Queue()
+        for _ in range(size):
+            self._connections.put(self._connect())
+
+    def _connect(self):
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._connections.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class MemberCache:
+    """LRU of biometric ID -> MemberRecord over a read-only connection pool"""
+
+    def __init__(self, db_path=None, max_size=10000, pool_size=4, revalidate_interval=1.0):
+        self.db_path = db_path or default_database_path()
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(f"member database not found: {self.db_path}")
+        self.max_size = max_size
+        self.revalidate_interval = revalidate_interval
+        self.pool = ReadOnlyConnectionPool(self.db_path, pool_size)
+        # Separate connection: data_version is per connection and only moves
+        # when *other* connections commit, so it must not be shared.
+        self._watch_conn = self.pool._connect()
+        self._data_version = self._read_data_version()
+        self._fingerprint = self._read_fingerprint()
+        self._checking = False
+        with self.pool.connection() as conn:
+            self.grace_days = self._read_grace_days(conn)
+        self._next_check = time.monotonic() + revalidate_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.skipped_reloads = 0
+
+    def _read_data_version(self):
+        return self._watch_conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def _read_fingerprint(self):
+        return tuple(self._watch_conn.execute(_FINGERPRINT_SELECT).fetchone())
+
+    def _read_grace_days(self, conn):
+        row = conn.execute("SELECT value FROM settings WHERE key = 'payment_grace_period_days'").fetchone()
+        try:
+            return int(row[0]) if row else 3
+        except (TypeError, ValueError):
+            return 3
+
+    @staticmethod
+    def _record(row, grace_days):
+        due_date = None
+        if row['duration_days']:
+            reference = _parse_date(row['last_payment_date']) or _parse_date(row['join_date'])
+            if reference is not None:
+                due_date = reference + timedelta(days=row['duration_days'])
+        return MemberRecord(row['id'], row['name'], row['biometric_id'], bool(row['is_active']),
+                            bool(row['has_plan']), due_date, grace_days)
+
+    def _revalidate(self):
+        """Check in the background whether the database changed since the last check"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        with self._lock:
+            if now < self._next_check or self._checking:
+                return
+            self._next_check = now + self.revalidate_interval
+            version = self._read_data_version()
+            if version == self._data_version:
+                return
+            self._data_version = version
+            self._checking = True
+        # A few ms of fingerprinting stays off the lookup path
+        threading.Thread(target=self._compare_fingerprint, name='member-cache-check', daemon=True).start()
+
+    def _compare_fingerprint(self):
+        """Drop everything and re-warm if the cached members' rows changed"""
+        try:
+            fingerprint = self._read_fingerprint()
+        except sqlite3.Error:
+            fingerprint = None  # can't tell: treat as changed
+        with self._lock:
+            self._checking = False
+            if fingerprint is not None and fingerprint == self._fingerprint:
+                self.skipped_reloads += 1
+                return
+            self._fingerprint = fingerprint
+            self._entries.clear()
+            self._generation += 1
+            self.reloads += 1
+        self.warm()
+
+    def _store(self, key, value, generation):
+        with self._lock:
+            if generation != self._generation:
+                return  # loaded before an invalidation; don't resurrect stale data
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def warm(self):
+        """Bulk-load enrolled members (up to max_size) in one query"""
+        generation = self._generation
+        with self.pool.connection() as conn:
+            grace_days = self.grace_days = self._read_grace_days(conn)
+            rows = conn.execute(_MEMBER_SELECT + ' WHERE m.biometric_id IS NOT NULL LIMIT ?',
+                                (self.max_size,)).fetchall()
+        loaded = {}
+        for row in rows:
+            key = normalize_biometric_id(row['biometric_id'])
+            # A miss queries biometric_id = key exactly, like findMemberByBiometricId,
+            # so a non-canonical stored ID ('05', ' 5') is never found; don't cache it
+            if key is not None and str(row['biometric_id']) == key:
+                loaded[key] = self._record(row, grace_days)
+        with self._lock:
+            if generation != self._generation:
+                return 0
+            self._entries.update(loaded)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return len(loaded)
+
+    def lookup(self, biometric_id):
+        """MemberRecord for a device user ID, or None if nobody is enrolled with it"""
+        key = normalize_biometric_id(biometric_id)
+        if key is None:
+            return None
+        self._revalidate()
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return None if value is _MISSING else value
+            self.misses += 1
+            generation = self._generation
+
+        with self.pool.connection() as conn:
+            row = conn.execute(_MEMBER_SELECT + ' WHERE m.biometric_id = ?', (key,)).fetchone()
+            record = self._record(row, self.grace_days) if row else None
+        self._store(key, _MISSING if record is None else record, generation)
+        return record
+
+    def access_decision(self, biometric_id, now=None):
+        """(allowed, reason, record) for a scan
+
+        reason is 'ok', 'unknown_member', 'no_active_plan' or 'lookup_error';
+        like findMemberByBiometricId, a database error counts as no member.
+        """
+        try:
+            record = self.lookup(biometric_id)
+        except sqlite3.Error:
+            return False, 'lookup_error', None
+        if record is None:
+            return False, 'unknown_member', None
+        if not plan_is_active(record, now):
+            return False, 'no_active_plan', record
+        return True, 'ok', record
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                    'reloads': self.reloads, 'skipped_reloads': self.skipped_reloads}
+
+    def close(self):
+        self.pool.close()
+        self._watch_conn.close()
@@ -0,0 +1,136 @@
+"""
+Bounded, per-connection-ordered work pool for the Python biometric listener
+
+Connection readers only frame messages and `submit` them; a fixed set of
+handler threads does the parsing, lookups and logging. Messages of one
+connection go into that connection's lane and a lane is served by at most
+one handler at a time, so a device always gets its ACKs in the order it
+sent the scans while different devices are handled in parallel. Lanes with
+work wait in a FIFO and a handler takes one message per turn before putting
+the lane back, so one chatty device cannot starve the others.
+
+At most `max_queue` messages wait across all lanes. When that is reached,
+`submit` either blocks the reader (it stops calling recv, and TCP flow
+control slows the device down) or refuses the message so the caller can
+answer it with a busy ACK. A refused message that still has older messages
+queued on its lane is kept in the lane as a rejection, outside the bound, so
+that its busy ACK goes out after their ACKs.
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class Lane:
+    """Pending messages of one connection"""
+
+    __slots__ = ('pending', 'scheduled', 'idle')
+
+    def __init__(self):
+        self.pending = deque()    # (item, enqueued_at, rejected)
+        self.scheduled = False    # queued for, or being served by, a handler
+        self.idle = threading.Event()
+        self.idle.set()
+
+
+class OrderedWorkPool:
+    """Fixed-size handler pool over bounded per-connection lanes
+
+    `process(item, waited)` handles an accepted message after it waited
+    `waited` seconds in the queue; `reject(item)` answers one that was
+    refused because the queue was full. Both run on handler threads.
+    """
+
+    def __init__(self, process, reject, threads=16, max_queue=1000):
+        self.process = process
+        self.reject = reject
+        self.max_queue = max_queue
+        self._ready = deque()
+        self._depth = 0
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._closed = False
+        self._threads = [threading.Thread(target=self._run, name=f'handler-{i}', daemon=True)
+                         for i in range(threads)]
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def depth(self):
+        """Accepted messages waiting for a handler (rejections not included)"""
+        return self._depth
+
+    def _schedule(self, lane):
+        if not lane.scheduled:
+            lane.scheduled = True
+            lane.idle.clear()
+            self._ready.append(lane)
+            self._not_empty.notify()
+
+    def submit(self, lane, item, block=True, timeout=None):
+        """Queue `item` on `lane`
+
+        Returns True once queued (as work, or as a rejection behind older
+        messages of the lane) and False when the caller must answer the
+        refusal itself: the queue is full, `block` is off (or `timeout`
+        expired) and the lane has nothing in front of it.
+        """
+        with self._lock:
+            if self._depth >= self.max_queue and block:
+                self._not_full.wait_for(lambda: self._depth < self.max_queue or self._closed, timeout)
+            if self._depth >= self.max_queue or self._closed:
+                if not lane.scheduled:
+                    return False
+                lane.pending.append((item, None, True))
+                return True
+            lane.pending.append((item, time.monotonic(), False))
+            self._depth += 1
+            self._schedule(lane)
+            return True
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._ready:
+                    if self._closed:
+                        return
+                    self._not_empty.wait()
+                lane = self._ready.popleft()
+                item, enqueued_at, rejected = lane.pending.popleft()
+                if not rejected:
+                    self._depth -= 1
+                    self._not_full.notify()
+            try:
+                if rejected:
+                    self.reject(item)
+                else:
+                    self.process(item, time.monotonic() - enqueued_at)
+            except Exception:
+                pass  # handlers report their own errors; keep the thread alive
+            with self._lock:
+                if lane.pending:
+                    # Back of the line: one message per turn keeps lanes fair
+                    self._ready.append(lane)
+                    self._not_empty.notify()
+                else:
+                    lane.scheduled = False
+                    lane.idle.set()
+
+    def wait_idle(self, lane, timeout=None):
+        """Block until everything queued on `lane` has been handled"""
+        return lane.idle.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """Finish the queued work, then stop the handler threads"""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            if thread.is_alive():
+                thread.join(max(0.0, deadline - time.monotonic()))
@@ -0,0 +1,136 @@
+"""
+Multi-process worker supervisor for the Python biometric listener
+
+Forks N worker processes that each bind the listener port with SO_REUSEPORT,
+so the kernel spreads incoming device connections across them and parsing
+and handling run on all cores instead of behind one GIL. A connection stays
+on the worker that accepted it for its whole life.
+
+The supervisor (the original process) only watches its children: a worker
+that dies is restarted in the same slot, with a backoff when a slot keeps
+crashing right after start so a bad config doesn't spin. SIGTERM/SIGINT are
+forwarded to every worker, which drains its connections and exits; workers
+still alive after the drain timeout are killed.
+
+POSIX only (fork + SO_REUSEPORT); Windows keeps the single-process mode.
+"""
+
+import os
+import signal
+import socket
+import threading
+import time
+
+# A worker that lives at least this long is considered healthy again
+_HEALTHY_UPTIME = 10.0
+_MAX_RESTART_DELAY = 30.0
+
+
+def workers_supported():
+    return hasattr(os, 'fork') and hasattr(socket, 'SO_REUSEPORT')
+
+
+class WorkerSupervisor:
+    """Keeps `count` forked copies of `run_worker(index)` alive
+
+    `run_worker` is called in the child and its return value becomes the
+    child's exit status. It must build everything that holds threads,
+    sockets or SQLite connections itself: none of those survive a fork.
+    """
+
+    def __init__(self, run_worker, count, drain_timeout=10.0, log=None):
+        self.run_worker = run_worker
+        self.count = count
+        self.drain_timeout = drain_timeout
+        self.log = log or (lambda msg, **fields: None)
+        self._slots = {}        # pid -> worker index
+        self._started_at = {}   # worker index -> monotonic start time
+        self._failures = {}     # worker index -> consecutive quick deaths
+        self._restart_at = {}   # worker index -> earliest restart time
+        self._stopping = threading.Event()
+        self.restarts = 0
+
+    def _spawn(self, index):
+        pid = os.fork()
+        if pid == 0:
+            # Child: take default signal dispositions back before the worker
+            # installs its own, so a SIGTERM during setup still ends it
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            status = 1
+            try:
+                status = self.run_worker(index) or 0
+            except SystemExit as e:
+                status = e.code if isinstance(e.code, int) else 0
+            except BaseException as e:
+                self.log(f"worker {index} crashed: {e!r}")
+            finally:
+                os._exit(status)
+        self._slots[pid] = index
+        self._started_at[index] = time.monotonic()
+        self.log(f"worker {index} started", worker=index, pid=pid)
+
+    def _request_stop(self, sig, frame):
+        self._stopping.set()
+
+    def _reap(self):
+        """Collect exited children; schedule restarts for their slots"""
+        while self._slots:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self._slots.clear()
+                return
+            if pid == 0:
+                return
+            index = self._slots.pop(pid, None)
+            if index is None or self._stopping.is_set():
+                continue
+            uptime = time.monotonic() - self._started_at[index]
+            failures = self._failures[index] = 0 if uptime >= _HEALTHY_UPTIME else self._failures.get(index, 0) + 1
+            delay = min(_MAX_RESTART_DELAY, 0.5 * (2 ** failures)) if failures else 0.0
+            self._restart_at[index] = time.monotonic() + delay
+            self.log(f"worker {index} exited, restarting in {delay:.1f}s", worker=index, pid=pid,
+                     status=os.waitstatus_to_exitcode(status), uptime_s=round(uptime, 1))
+
+    def _restart_due(self):
+        now = time.monotonic()
+        for index, due in list(self._restart_at.items()):
+            if due <= now and not self._stopping.is_set():
+                del self._restart_at[index]
+                self.restarts += 1
+                self._spawn(index)
+
+    def _shutdown(self):
+        pids = list(self._slots)
+        self.log(f"stopping {len(pids)} workers (drain up to {self.drain_timeout:g}s)")
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        # Workers drain for drain_timeout themselves; allow a little extra to flush and exit
+        deadline = time.monotonic() + self.drain_timeout + 5.0
+        while self._slots and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.05)
+        for pid, index in list(self._slots.items()):
+            self.log(f"worker {index} did not exit in time, killing it", worker=index, pid=pid)
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self._slots.clear()
+
+    def run(self):
+        """Supervise until SIGTERM/SIGINT, then drain every worker; returns 0"""
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        for index in range(self.count):
+            self._spawn(index)
+        while not self._stopping.wait(0.2):
+            self._reap()
+            self._restart_due()
+        self._shutdown()
+        return 0
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""1:N gallery matcher benchmark: latency and memory from 100 to 100k members.
+
+Answers "does our member count need an ANN index?" for gallery.Gallery's
+brute-force scan. For every gallery size and storage dtype it reports:
+
+  - memory: bytes used by the live rows and bytes allocated (the matrix
+    starts at 1024 rows and doubles when full, so allocated runs ahead)
+  - enroll time per member, and one remove + re-enroll (incremental update)
+  - match latency p50/p99 for a single probe (one kiosk frame) and a batch
+  - top-1 agreement and max score error of float16/int8 vs float32
+
+Embeddings are synthetic (random unit vectors per member; probes are a
+member's sample plus noise), so scores are not LFW-realistic — latency and
+memory depend only on the shapes. Re-check float16/int8 agreement on real
+enrollments before relying on it. The verdict names the largest size whose
+single-probe p99 stays within --budget-ms with some dtype.
+
+Usage:
+  .venv/bin/python bench_gallery.py                          # 100..100k, 3 samples/member
+  .venv/bin/python bench_gallery.py --sizes 100,2000 --dtypes float32,int8 --budget-ms 5
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from gallery import DEFAULT_THRESHOLD, DTYPES, EMBEDDING_DIM, Gallery
+
+
+HERE = Path(__file__).resolve().parent
+
+
+def log(msg: str) -> None:
+    print(f"[bench-gallery] {msg}", flush=True)
+
+
+def timed(fn, repeats: int) -> np.ndarray:
+    """Per-call wall times in ms."""
+    times = np.empty(repeats)
+    for i in range(repeats):
+        started = time.perf_counter()
+        fn()
+        times[i] = (time.perf_counter() - started) * 1000
+    return times
+
+
+def enrolled(dtype: str, samples: np.ndarray) -> Gallery:
+    gallery = Gallery(dtype=dtype)
+    for member in range(len(samples)):
+        gallery.enroll(member, samples[member])
+    return gallery
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100,1000,10000,100000",
+                        help="comma-separated gallery sizes (members)")
+    parser.add_argument("--dtypes", default=",".join(DTYPES))
+    parser.add_argument("--samples", type=int, default=3,
+                        help="enrolled samples per member")
+    parser.add_argument("--batch", type=int, default=32,
+                        help="probes per batched query")
+    parser.add_argument("--repeats", type=int, default=50,
+                        help="timed queries per cell (after 3 warmups)")
+    parser.add_argument("--budget-ms", type=float, default=10.0,
+                        help="per-frame matching budget; sizes whose single-probe "
+                             "p99 exceeds it with every dtype need an ANN index")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sizes = sorted(int(v) for v in args.sizes.split(","))
+    dtypes = [d for d in args.dtypes.split(",") if d]
+    for d in dtypes:
+        if d not in DTYPES:
+            parser.error(f"unknown dtype {d!r} (choose from {', '.join(DTYPES)})")
+    # float32 first: it is the reference the other dtypes' agreement is measured against
+    dtypes.sort(key=lambda d: d != "float32")
+
+    rng = np.random.default_rng(args.seed)
+    rows = []
+    for size in sizes:
+        identities = rng.standard_normal((size, EMBEDDING_DIM), dtype=np.float32)
+        samples = (identities[:, None, :] + 0.3 * rng.standard_normal(
+            (size, args.samples, EMBEDDING_DIM), dtype=np.float32))
+        picked = rng.integers(0, size, args.batch)
+        probes = identities[picked] + 0.3 * rng.standard_normal(
+            (args.batch, EMBEDDING_DIM), dtype=np.float32)
+
+        reference = None
+        if dtypes[0] != "float32":
+            best, top1, _, _ = enrolled("float32", samples).match(probes)
+            reference = (best, top1)
+        for dtype in dtypes:
+            started = time.perf_counter()
+            gallery = enrolled(dtype, samples)
+            enroll_ms = (time.perf_counter() - started) * 1000
+
+            churn = int(picked[0])
+            started = time.perf_counter()
+            gallery.remove(churn)
+            gallery.enroll(churn, samples[churn])
+            update_ms = (time.perf_counter() - started) * 1000
+
+            for _ in range(3):
+                gallery.match(probes[:1])
+                gallery.match(probes)
+            single = timed(lambda: gallery.match(probes[:1]), args.repeats)
+            batch = timed(lambda: gallery.match(probes), args.repeats)
+
+            best, top1, _, accepted = gallery.match(probes)
+            row = {
+                "members": size,
+                "rows": len(gallery),
+                "dtype": dtype,
+                "memory_bytes_live": gallery.nbytes(),
+                "memory_bytes_allocated": gallery.allocated_nbytes(),
+                "enroll_us_per_member": round(1000 * enroll_ms / size, 2),
+                "remove_reenroll_ms": round(update_ms, 3),
+                "single_p50_ms": round(float(np.percentile(single, 50)), 3),
+                "single_p99_ms": round(float(np.percentile(single, 99)), 3),
+                "batch": args.batch,
+                "batch_p50_ms": round(float(np.percentile(batch, 50)), 3),
+                "batch_p99_ms": round(float(np.percentile(batch, 99)), 3),
+                "top1_correct": round(float(np.mean(best == picked)), 4),
+                "accepted_at_default_threshold": int(accepted.sum()),
+            }
+            if dtype == "float32":
+                reference = (best, top1)
+            else:
+                row["top1_agreement_vs_float32"] = round(float(np.mean(best == reference[0])), 4)
+                row["max_score_error"] = round(float(np.max(np.abs(top1 - reference[1]))), 5)
+            rows.append(row)
+            log(f"{size:>7} members {dtype:>7}: {row['memory_bytes_live'] / 2**20:8.2f} MiB live / "
+                f"{row['memory_bytes_allocated'] / 2**20:.2f} MiB allocated, "
+                f"1 probe p50 {row['single_p50_ms']:.3f} / p99 {row['single_p99_ms']:.3f} ms, "
+                f"{args.batch} probes p50 {row['batch_p50_ms']:.3f} ms, "
+                f"update {row['remove_reenroll_ms']:.3f} ms")
+
+    within = [r["members"] for r in rows if r["single_p99_ms"] <= args.budget_ms]
+    max_members = max(within, default=0)
+    needs_ann = max_members < sizes[-1]
+    verdict = (f"brute-force scan stays within {args.budget_ms:g} ms p99 up to "
+               f"{max_members} members" if max_members else
+               f"brute-force scan misses the {args.budget_ms:g} ms p99 budget at every size")
+    if needs_ann:
+        verdict += f"; {sizes[-1]} members needs an ANN index"
+    log(verdict)
+
+    out = HERE / "build/gallery_bench.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({
+        "embedding_dim": EMBEDDING_DIM,
+        "samples_per_member": args.samples,
+        "threshold": DEFAULT_THRESHOLD,
+        "budget_ms": args.budget_ms,
+        "max_members_within_budget": max_members,
+        "needs_ann_index": needs_ann,
+        "verdict": verdict,
+        "runs": rows,
+    }, indent=2))
+    log(f"report -> {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Detection downscale sweep: YuNet speed vs detection failures and EER.
+
+For every LFW pair, each image is detected once per candidate cap on the
+longest side (TflitePipeline.detect with max_side) and embedded from the
+full-resolution alignCrop, so all caps see exactly the same images in one
+pass. Reports, per cap:
+
+  - mean YuNet time per image and speedup over full resolution
+  - detection-failure rate (images with no face) and its change
+  - EER and its change, over the pairs EVERY cap detected, so the EER
+    delta measures matching quality only and detection loss shows up in
+    the no-face rate alone
+
+LFW images are 250x250; --input-scale upsamples them first so the full-res
+baseline costs what a camera frame would (4 -> 1000x1000). Upsampling adds
+pixels, not detail, so the failure/EER deltas are a lower bound on what a
+real high-res frame loses — confirm the chosen cap on gym footage too.
+
+Usage:
+  .venv/bin/python detect_scale.py                          # 0,640,480,320,240,160 at 4x
+  .venv/bin/python detect_scale.py --max-sides 0,320,160 --input-scale 8 --limit 600
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from evaluate import (HERE, SFACE_ONNX, THRESHOLDS, YUNET_ONNX, TflitePipeline,
+                      load_pairs, rescale, sweep)
+
+
+def log(msg: str) -> None:
+    print(f"[detect-scale] {msg}", flush=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embedder", type=Path,
+                        default=HERE / "build/face_embedder_v1_fp32.tflite")
+    parser.add_argument("--subset", choices=["test", "train"], default="test")
+    parser.add_argument("--limit", type=int, default=0,
+                        help="only evaluate the first N pairs (0 = all)")
+    parser.add_argument("--norm", choices=["raw", "arcface", "opencv"], default="raw")
+    parser.add_argument("--max-sides", default="0,640,480,320,240,160",
+                        help="comma-separated caps on the detector input's longest "
+                             "side; 0 = full resolution (the baseline)")
+    parser.add_argument("--input-scale", type=float, default=4.0,
+                        help="upscale LFW images by this factor first (camera-sized frames)")
+    args = parser.parse_args()
+
+    max_sides = sorted({int(v) for v in args.max_sides.split(",")}, key=lambda v: (v != 0, -v))
+    if max_sides[0] != 0:
+        max_sides.insert(0, 0)  # the full-res baseline every delta is measured against
+
+    for f in (args.embedder, SFACE_ONNX, YUNET_ONNX):
+        if not Path(f).exists():
+            log(f"missing {f} — run ./download-models.sh and convert.py first")
+            return 1
+
+    pipeline = TflitePipeline(args.embedder, norm=args.norm)
+    runs = {side: {"seconds": 0.0, "images": 0, "failures": 0, "sims": {}} for side in max_sides}
+    labels = {}
+
+    for i, (img_a, img_b, label) in enumerate(load_pairs(args.subset)):
+        if args.limit and i >= args.limit:
+            break
+        labels[i] = label
+        imgs = [rescale(img, args.input_scale) for img in (img_a, img_b)]
+        for side in max_sides:
+            run = runs[side]
+            embs = []
+            for img in imgs:
+                started = time.perf_counter()
+                face = pipeline.detect(img, max_side=side)
+                run["seconds"] += time.perf_counter() - started
+                run["images"] += 1
+                if face is None:
+                    run["failures"] += 1
+                    embs.append(None)
+                else:
+                    embs.append(pipeline.embed_face(img, face))
+            if embs[0] is not None and embs[1] is not None:
+                run["sims"][i] = float(np.dot(embs[0], embs[1]))
+        if (i + 1) % 200 == 0:
+            log(f"{i + 1} pairs done")
+
+    common = sorted(set.intersection(*(set(runs[side]["sims"]) for side in max_sides)))
+    common_labels = np.array([labels[i] for i in common])
+    rows = []
+    for side in max_sides:
+        run = runs[side]
+        sims = np.array([run["sims"][i] for i in common])
+        same, diff = sims[common_labels == 1], sims[common_labels == 0]
+        eer = eer_threshold = None
+        if len(same) and len(diff):
+            fars, frrs, eer_idx = sweep(same, diff)
+            eer = float((fars[eer_idx] + frrs[eer_idx]) / 2)
+            eer_threshold = float(THRESHOLDS[eer_idx])
+        rows.append({
+            "max_side": side,
+            "detect_ms": round(1000 * run["seconds"] / run["images"], 3) if run["images"] else None,
+            "failure_rate": round(run["failures"] / run["images"], 5) if run["images"] else None,
+            "failures": run["failures"],
+            "images": run["images"],
+            "pairs_detected": len(run["sims"]),
+            "pairs_evaluated": len(common),
+            "eer": None if eer is None else round(eer, 5),
+            "eer_threshold": None if eer_threshold is None else round(eer_threshold, 4),
+        })
+
+    base = rows[0]
+    for row in rows:
+        row["speedup"] = (round(base["detect_ms"] / row["detect_ms"], 2)
+                          if base["detect_ms"] and row["detect_ms"] else None)
+        row["failure_rate_delta"] = (round(row["failure_rate"] - base["failure_rate"], 5)
+                                     if row["failure_rate"] is not None else None)
+        row["eer_delta"] = (round(row["eer"] - base["eer"], 5)
+                            if row["eer"] is not None and base["eer"] is not None else None)
+
+    log(f"input {args.input_scale:g}x LFW, {rows[0]['images'] // 2} pairs, "
+        f"EER over the {len(common)} detected at every cap")
+    log("max side | detect ms | speedup | no-face rate (delta) | EER (delta)")
+    for row in rows:
+        eer = "n/a" if row["eer"] is None else f"{row['eer']:.3%} ({row['eer_delta']:+.3%})"
+        log(f"{row['max_side'] or 'full':>8} | {row['detect_ms']:9.2f} | {row['speedup']:6.2f}x | "
+            f"{row['failure_rate']:.3%} ({row['failure_rate_delta']:+.3%}) | {eer}")
+
+    out = HERE / "build/detect_scale_report.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({
+        "embedder": args.embedder.name,
+        "subset": args.subset,
+        "input_scale": args.input_scale,
+        "eer_pairs": len(common),
+        "runs": rows,
+    }, indent=2))
+    log(f"report -> {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -24,6 +24,17 @@ raw false-accept counts, denominators, and a 95% CI so this isn't mistaken
 for a resolved low FAR. To actually resolve a 0.1% FAR you need O(1e4-1e5)
 negatives; 1100 cannot.
 
+Adaptive mode (--adaptive): pairs are embedded in shuffled batches and the
+FAR Wilson CI at the recommended threshold is recomputed after each one;
+evaluation stops once it is narrower than --ci-width, and each batch logs
+how many negatives the current estimate projects are needed. If the split
+runs out first, impostor scores between images of different pairs (no new
+embeddings) are swept up to the target or --max-impostors, but reported only
+in the "adaptive.cross_pair" block — they are not independent trials, so the
+headline FAR, its CI and the resolution warning use the pair negatives
+alone. The "adaptive" section records why it stopped and the pairs and
+embedding time it saved.
+
 Alignment note: this harness aligns with OpenCV's YuNet+SFace alignCrop —
 the browser pipeline will align with MediaPipe landmarks. Small skew is
 expected; shadow mode (plan Section 8.3) is the real-world validation.
@@ -39,6 +50,8 @@ Usage:
   .venv/bin/python evaluate.py                       # fp32 tflite, test split
   .venv/bin/python evaluate.py --subset train        # other split
   .venv/bin/python evaluate.py --embedder build/face_embedder_v1_int8.tflite
+  .venv/bin/python evaluate.py --detect-max-side 320 --input-scale 4
+  .venv/bin/python evaluate.py --adaptive --ci-width 0.005  # stop once the FAR CI is 0.5 pp wide
 """
 
 import argparse
@@ -47,6 +60,7 @@ import json
 import math
 import os
 import sys
+import time
 from pathlib import Path
 
 import cv2
@@ -62,11 +76,28 @@ def log(msg: str) -> None:
     print(f"[evaluate] {msg}", flush=True)
 
 
+# YuNet row columns holding x and y positions (box corner + 5 landmarks).
+_FACE_X = [0, 4, 6, 8, 10, 12]
+_FACE_Y = [1, 5, 7, 9, 11, 13]
+
+
 class TflitePipeline:
-    """YuNet detect -> SFace alignCrop -> tflite embed."""
+    """YuNet detect -> SFace alignCrop -> tflite embed.
 
-    def __init__(self, embedder_path: Path, norm: str = "raw"):
+    detect_max_side > 0 runs YuNet on a copy downscaled so its longest side is
+    at most that many pixels (YuNet's cost grows with pixel count; camera
+    frames are far larger than LFW's 250x250). The box and landmarks are
+    mapped back and alignCrop still samples the full-resolution image, so
+    only localization precision is traded, not crop resolution.
+    """
+
+    def __init__(self, embedder_path: Path, norm: str = "raw", detect_max_side: int = 0):
         self.norm = norm
+        self.detect_max_side = detect_max_side
+        # Detection stats for the report: calls, no-face results, seconds.
+        self.detect_calls = 0
+        self.detect_failures = 0
+        self.detect_seconds = 0.0
         self.detector = cv2.FaceDetectorYN.create(str(YUNET_ONNX), "", (0, 0),
                                                   score_threshold=0.6)
         # Used only for its landmark-based alignCrop, not its inference.
@@ -78,13 +109,40 @@ class TflitePipeline:
         self.inp = self.interp.get_input_details()[0]
         self.out = self.interp.get_output_details()[0]
 
-    def embed(self, bgr: np.ndarray) -> np.ndarray | None:
-        """Returns an L2-normalized embedding, or None if no face detected."""
-        self.detector.setInputSize((bgr.shape[1], bgr.shape[0]))
-        _, faces = self.detector.detect(bgr)
+    def detect(self, bgr: np.ndarray, max_side: int | None = None) -> np.ndarray | None:
+        """Highest-scoring YuNet face in full-resolution coordinates, or None.
+
+        max_side overrides detect_max_side for this call (0 = full res).
+        """
+        max_side = self.detect_max_side if max_side is None else max_side
+        h, w = bgr.shape[:2]
+        started = time.perf_counter()
+        img = bgr
+        if max_side and max(h, w) > max_side:
+            scale = max_side / max(h, w)
+            size = (max(1, round(w * scale)), max(1, round(h * scale)))
+            img = cv2.resize(bgr, size, interpolation=cv2.INTER_AREA)
+        self.detector.setInputSize((img.shape[1], img.shape[0]))
+        _, faces = self.detector.detect(img)
+        self.detect_seconds += time.perf_counter() - started
+        self.detect_calls += 1
         if faces is None or len(faces) == 0:
+            self.detect_failures += 1
             return None
-        face = faces[np.argmax(faces[:, -1])]  # highest detection score
+        face = faces[np.argmax(faces[:, -1])].copy()  # highest detection score
+        if img is not bgr:
+            # Row layout: x, y, w, h, 5 landmark (x, y) pairs, score. Rounding
+            # the resized size makes the two axes' factors differ slightly;
+            # positions map pixel centers ((v + 0.5) / s - 0.5), sizes just / s.
+            sx, sy = img.shape[1] / w, img.shape[0] / h
+            face[_FACE_X] = (face[_FACE_X] + 0.5) / sx - 0.5
+            face[_FACE_Y] = (face[_FACE_Y] + 0.5) / sy - 0.5
+            face[2] /= sx
+            face[3] /= sy
+        return face
+
+    def embed_face(self, bgr: np.ndarray, face: np.ndarray) -> np.ndarray:
+        """L2-normalized embedding of a detected face (full-res alignment)."""
         crop = self.aligner.alignCrop(bgr, face)  # 112x112x3 uint8 BGR
         if self.norm == "opencv":
             # Control path: OpenCV's own SFace inference (reference impl).
@@ -98,6 +156,27 @@ class TflitePipeline:
         emb = self.interp.get_tensor(self.out["index"])[0].astype(np.float64)
         return emb / np.linalg.norm(emb)
 
+    def embed(self, bgr: np.ndarray) -> np.ndarray | None:
+        """Returns an L2-normalized embedding, or None if no face detected."""
+        face = self.detect(bgr)
+        return None if face is None else self.embed_face(bgr, face)
+
+    def detection_stats(self) -> dict:
+        return {
+            "max_side": self.detect_max_side,
+            "images": self.detect_calls,
+            "failures": self.detect_failures,
+            "failure_rate": round(self.detect_failures / self.detect_calls, 5) if self.detect_calls else 0.0,
+            "mean_ms": round(1000 * self.detect_seconds / self.detect_calls, 3) if self.detect_calls else 0.0,
+        }
+
+
+def rescale(bgr: np.ndarray, factor: float) -> np.ndarray:
+    """Upscale an LFW image to stand in for a larger camera frame."""
+    if factor == 1:
+        return bgr
+    return cv2.resize(bgr, None, fx=factor, fy=factor, interpolation=cv2.INTER_CUBIC)
+
 
 # Pinned to an immutable revision (not `main`, which moves) and verified by
 # SHA-256. Update all three together if the dataset is intentionally bumped.
@@ -118,12 +197,10 @@ def _sha256(path: Path) -> str:
     return h.hexdigest()
 
 
-def load_pairs(subset: str):
-    """Yields (bgr_img_0, bgr_img_1, label) tuples; label 1 = same person."""
+def pairs_parquet(subset: str) -> Path:
+    """Path of the verified LFW pairs parquet, downloading it if needed."""
     import urllib.request
 
-    import pandas as pd
-
     expected = LFW_SHA256[subset]
     cache = HERE / "build/datasets" / f"lfw-pairs-{subset}.parquet"
     # Re-download if missing OR if a cached copy fails the checksum (guards
@@ -145,10 +222,18 @@ def load_pairs(subset: str):
                 "download is corrupt — refusing to evaluate a lock threshold "
                 "against unverified data.")
         os.replace(tmp, cache)  # atomic: no partial file is ever named .parquet
+    return cache
+
+
+def load_pairs(subset: str, seed: int = 0):
+    """Yields (bgr_img_0, bgr_img_1, label) tuples; label 1 = same person."""
+    import pandas as pd
+
+    cache = pairs_parquet(subset)
     df = pd.read_parquet(cache)
     # The parquet is ordered (all same-person pairs first); shuffle
     # deterministically so --limit N still sees both classes.
-    df = df.sample(frac=1, random_state=0).reset_index(drop=True)
+    df = df.sample(frac=1, random_state=seed).reset_index(drop=True)
     log(f"loaded {len(df)} pairs from {cache.name}")
     for _, row in df.iterrows():
         imgs = [
@@ -158,12 +243,6 @@ def load_pairs(subset: str):
         yield imgs[0], imgs[1], int(row["pair"])
 
 
-def far_frr(same: np.ndarray, diff: np.ndarray, threshold: float):
-    far = float(np.mean(diff >= threshold))
-    frr = float(np.mean(same < threshold))
-    return far, frr
-
-
 def wilson_interval(k: int, n: int, z: float = 1.96):
     """95% Wilson score interval for a binomial proportion k/n.
 
@@ -180,6 +259,28 @@ def wilson_interval(k: int, n: int, z: float = 1.96):
     return max(0.0, center - half), min(1.0, center + half)
 
 
+THRESHOLDS = np.linspace(-0.2, 1.0, 1201)
+
+
+def sweep(same: np.ndarray, diff: np.ndarray):
+    """(fars, frrs) over THRESHOLDS, and the index of the EER point.
+
+    FAR counts impostor scores >= t and FRR genuine scores < t, from one
+    sort per class instead of a pass over all scores per threshold — the adaptive mode
+    re-sweeps after every batch, over up to a million impostor scores.
+    """
+    diff_sorted, same_sorted = np.sort(diff), np.sort(same)
+    fars = (len(diff) - np.searchsorted(diff_sorted, THRESHOLDS, side="left")) / len(diff)
+    frrs = np.searchsorted(same_sorted, THRESHOLDS, side="left") / len(same)
+    return fars, frrs, int(np.argmin(np.abs(fars - frrs)))
+
+
+def recommended_index(fars: np.ndarray, far_target: float) -> int | None:
+    """Smallest threshold whose FAR meets the target (maximizes convenience)."""
+    meets = np.where(fars <= far_target)[0]
+    return int(meets[0]) if len(meets) else None
+
+
 def far_point(diff: np.ndarray, threshold: float):
     """(false_accepts, negatives, point_estimate) at a threshold."""
     k = int(np.sum(diff >= threshold))
@@ -187,6 +288,188 @@ def far_point(diff: np.ndarray, threshold: float):
     return k, n, (k / n if n else 0.0)
 
 
+def negatives_needed(k: int, n: int, width: float) -> int:
+    """Trials needed for a Wilson CI no wider than `width` at the rate k/n.
+
+    Projects from the current estimate, so it moves as the estimate does;
+    it is a planning number, not a guarantee.
+    """
+    rate = k / n if n else 0.0
+    lo, hi = 1, 1
+    while True:
+        low, high = wilson_interval(rate * hi, hi)
+        if high - low <= width or hi >= 10**9:
+            break
+        lo, hi = hi, hi * 2
+    while lo < hi:
+        mid = (lo + hi) // 2
+        low, high = wilson_interval(rate * mid, mid)
+        if high - low <= width:
+            hi = mid
+        else:
+            lo = mid + 1
+    return hi
+
+
+def ci_at_recommended(same: np.ndarray, diff: np.ndarray, far_target: float) -> dict:
+    """FAR/FRR and their Wilson CI widths at the recommended threshold."""
+    fars, frrs, eer_idx = sweep(same, diff)
+    rec_idx = recommended_index(fars, far_target)
+    t = float(THRESHOLDS[eer_idx if rec_idx is None else rec_idx])
+    k, n, far = far_point(diff, t)
+    far_lo, far_hi = wilson_interval(k, n)
+    frr_k = int(np.sum(same < t))
+    frr_lo, frr_hi = wilson_interval(frr_k, len(same))
+    return {
+        "threshold": round(t, 4),
+        "far": round(far, 5),
+        "far_ci_width": round(far_hi - far_lo, 5),
+        "frr": round(frr_k / len(same), 5),
+        "frr_ci_width": round(frr_hi - frr_lo, 5),
+        "negatives": n,
+        "positives": int(len(same)),
+        "far_false_accepts": k,
+    }
+
+
+def cross_pair_impostors(embs: np.ndarray, limit: int):
+    """Yields chunks of impostor cosines between images of DIFFERENT pairs.
+
+    embs is (pairs, 2, dim). Images are laid out pair by pair and compared
+    with the image `shift` places on (wrapping), for shift 1 .. images/2 —
+    every unordered image combination once, skipping the two images of the
+    same pair. At the half shift image i and i + images/2 meet from both
+    ends, so only the first half is kept.
+    """
+    images = embs.reshape(-1, embs.shape[-1])
+    owners = np.repeat(np.arange(len(embs)), 2)
+    produced = 0
+    for shift in range(1, len(images) // 2 + 1):
+        keep = owners != np.roll(owners, -shift)
+        if 2 * shift == len(images):
+            keep &= np.arange(len(images)) < shift
+        chunk = np.einsum("ij,ij->i", images[keep],
+                          np.roll(images, -shift, axis=0)[keep])[:limit - produced]
+        produced += len(chunk)
+        yield chunk
+        if produced >= limit:
+            return
+
+
+def run_adaptive(pipeline: TflitePipeline, args):
+    """Sequential evaluation: shuffled batches until the FAR CI is narrow enough.
+
+    Returns (same, diff, skipped, pairs_evaluated, report section). diff holds
+    the pair negatives only; any cross-pair sweep lives in section["cross_pair"].
+    """
+    import itertools
+
+    import pandas as pd
+
+    available = len(pd.read_parquet(pairs_parquet(args.subset), columns=["pair"]))
+    budget = min(args.limit, available) if args.limit else available
+    pairs = load_pairs(args.subset, seed=args.seed)
+    embs, sims, labels, history = [], [], [], []
+    consumed = skipped = 0
+    same = diff = np.empty(0)
+    stopped = None
+    started = time.perf_counter()
+    while stopped is None:
+        before = consumed
+        for img_a, img_b, label in itertools.islice(pairs, min(args.batch_size, budget - consumed)):
+            consumed += 1
+            pair = [pipeline.embed(rescale(img, args.input_scale)) for img in (img_a, img_b)]
+            if pair[0] is None or pair[1] is None:
+                skipped += 1
+                continue
+            embs.append(pair)
+            sims.append(float(np.dot(pair[0], pair[1])))
+            labels.append(label)
+        sims_arr, labels_arr = np.array(sims), np.array(labels)
+        same, diff = sims_arr[labels_arr == 1], sims_arr[labels_arr == 0]
+        if len(same) and len(diff):
+            point = ci_at_recommended(same, diff, args.far_target)
+            point["pairs"] = consumed
+            point["negatives_needed"] = negatives_needed(
+                point["far_false_accepts"], point["negatives"], args.ci_width)
+            history.append(point)
+            log(f"batch {len(history)}: {consumed} pairs, threshold {point['threshold']} -> "
+                f"FAR {point['far']:.3%} (CI width {point['far_ci_width']:.3%}, target "
+                f"{args.ci_width:.3%}, ~{point['negatives_needed']} negatives needed), "
+                f"FRR {point['frr']:.3%} (CI width {point['frr_ci_width']:.3%})")
+            if point["far_ci_width"] <= args.ci_width:
+                stopped = "target_met"
+        if stopped is None and (consumed >= budget or consumed == before):
+            stopped = "pairs_exhausted"
+    embed_seconds = time.perf_counter() - started
+
+    # Out of pairs with the FAR still unresolved: impostor scores between
+    # images of different pairs cost no new embeddings. LFW pairs carry no
+    # identity labels, so a few of these may be the same person, which can
+    # only raise the measured FAR (the safe direction for a lock). Each image
+    # recurs in many of them, so they are not independent trials and the
+    # Wilson CI over them is narrower than the truth — so the sweep is
+    # reported on its own and never replaces the pair-negative headline.
+    cross_pair = None
+    if (stopped == "pairs_exhausted" and history and args.max_impostors
+            and history[-1]["far_ci_width"] > args.ci_width):
+        extra, impostors, checked = [], 0, len(diff)
+        cross_history = []
+        cross_stopped = "impostors_exhausted"
+        for chunk in cross_pair_impostors(np.array(embs), args.max_impostors):
+            extra.append(chunk)
+            impostors += len(chunk)
+            # Re-sweep each time the negatives grow by a quarter, not per chunk.
+            if len(diff) + impostors < 1.25 * checked and impostors < args.max_impostors:
+                continue
+            checked = len(diff) + impostors
+            point = ci_at_recommended(same, np.concatenate([diff, *extra]), args.far_target)
+            point["cross_pair_impostors"] = impostors
+            cross_history.append(point)
+            log(f"+{impostors} cross-pair impostors: threshold {point['threshold']} -> "
+                f"FAR {point['far']:.3%} (CI width {point['far_ci_width']:.3%}, not independent)")
+            if point["far_ci_width"] <= args.ci_width:
+                cross_stopped = "ci_width_below_target"
+                break
+        if cross_stopped == "impostors_exhausted" and impostors >= args.max_impostors:
+            cross_stopped = "impostor_cap"
+        if cross_history:
+            cross_pair = {
+                **cross_history[-1],
+                "stopped": cross_stopped,
+                "independent": False,
+                "history": cross_history,
+                "note": ("pair negatives plus impostor scores between images of different "
+                         "pairs; not independent trials, so the CI is optimistic. The "
+                         "headline FAR and far_95ci use the pair negatives only."),
+            }
+
+    saved = budget - consumed
+    per_pair = embed_seconds / consumed if consumed else 0.0
+    log(f"adaptive: stopped ({stopped}) after {consumed}/{budget} pairs — "
+        f"{saved} pairs ({saved / budget:.1%}, ~{saved * per_pair:.0f} s of embedding) saved")
+    if cross_pair:
+        log(f"cross-pair sweep ({cross_pair['stopped']}): {cross_pair['cross_pair_impostors']} "
+            f"impostors, FAR {cross_pair['far']:.3%} (CI width {cross_pair['far_ci_width']:.3%}) "
+            "— not independent, reported separately from the headline")
+    section = {
+        "ci_width_target": args.ci_width,
+        "batch_size": args.batch_size,
+        "seed": args.seed,
+        "stopped": stopped,
+        "pairs_available": budget,
+        "pairs_consumed": consumed,
+        "pairs_saved": saved,
+        "compute_saved_fraction": round(saved / budget, 4) if budget else 0.0,
+        "embed_seconds": round(embed_seconds, 2),
+        "est_seconds_saved": round(saved * per_pair, 2),
+        "history": history,
+    }
+    if cross_pair:
+        section["cross_pair"] = cross_pair
+    return same, diff, skipped, len(sims), section
+
+
 def main() -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument("--embedder", type=Path,
@@ -199,6 +482,24 @@ def main() -> int:
     parser.add_argument("--norm", choices=["raw", "arcface", "opencv"], default="raw",
                         help="raw 0..255, (x-127.5)/128, or OpenCV reference "
                              "inference as a control")
+    parser.add_argument("--detect-max-side", type=int, default=0,
+                        help="run YuNet on a copy with its longest side capped at "
+                             "this many pixels (0 = full resolution)")
+    parser.add_argument("--input-scale", type=float, default=1.0,
+                        help="upscale LFW images by this factor first, to stand in "
+                             "for camera-sized frames")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="evaluate in shuffled batches and stop once the FAR 95%% CI "
+                             "at the recommended threshold is narrower than --ci-width")
+    parser.add_argument("--ci-width", type=float, default=0.005,
+                        help="adaptive: target FAR CI width (0.005 = 0.5 percentage points)")
+    parser.add_argument("--batch-size", type=int, default=200,
+                        help="adaptive: pairs per batch between CI checks")
+    parser.add_argument("--max-impostors", type=int, default=1_000_000,
+                        help="adaptive: cross-pair impostor scores to add when the pairs "
+                             "run out before the target is met (0 = never)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="pair shuffle seed")
     args = parser.parse_args()
 
     for f in (args.embedder, SFACE_ONNX, YUNET_ONNX):
@@ -206,29 +507,38 @@ def main() -> int:
             log(f"missing {f} — run ./download-models.sh and convert.py first")
             return 1
 
-    pipeline = TflitePipeline(args.embedder, norm=args.norm)
+    pipeline = TflitePipeline(args.embedder, norm=args.norm,
+                              detect_max_side=args.detect_max_side)
 
-    sims, labels, skipped = [], [], 0
-    for i, (img_a, img_b, label) in enumerate(load_pairs(args.subset)):
-        if args.limit and i >= args.limit:
-            break
-        embs = [pipeline.embed(img_a), pipeline.embed(img_b)]
-        if embs[0] is None or embs[1] is None:
-            skipped += 1
-            continue
-        sims.append(float(np.dot(embs[0], embs[1])))
-        labels.append(label)
-        if (i + 1) % 200 == 0:
-            log(f"{i + 1} pairs done ({skipped} skipped)")
-
-    sims = np.array(sims)
-    labels = np.array(labels)
-    same, diff = sims[labels == 1], sims[labels == 0]
+    adaptive = None
+    if args.adaptive:
+        same, diff, skipped, evaluated, adaptive = run_adaptive(pipeline, args)
+    else:
+        sims, labels, skipped = [], [], 0
+        for i, (img_a, img_b, label) in enumerate(load_pairs(args.subset, seed=args.seed)):
+            if args.limit and i >= args.limit:
+                break
+            embs = [pipeline.embed(rescale(img, args.input_scale)) for img in (img_a, img_b)]
+            if embs[0] is None or embs[1] is None:
+                skipped += 1
+                continue
+            sims.append(float(np.dot(embs[0], embs[1])))
+            labels.append(label)
+            if (i + 1) % 200 == 0:
+                log(f"{i + 1} pairs done ({skipped} skipped)")
+
+        sims = np.array(sims)
+        labels = np.array(labels)
+        same, diff = sims[labels == 1], sims[labels == 0]
+        evaluated = len(sims)
     if len(same) == 0 or len(diff) == 0:
         log(f"insufficient data: {len(same)} same-pairs, {len(diff)} diff-pairs "
             f"({skipped} skipped) — cannot compute FAR/FRR. Aborting.")
         return 1
-    log(f"evaluated {len(sims)} pairs ({skipped} skipped: no face detected)")
+    log(f"evaluated {evaluated} pairs ({skipped} skipped: no face detected)")
+    detection = pipeline.detection_stats()
+    log(f"detection: max side {detection['max_side'] or 'full'}, {detection['mean_ms']:.2f} ms/image, "
+        f"{detection['failures']}/{detection['images']} images without a face")
     log(f"same-pair cosine mean {same.mean():.3f}, diff-pair mean {diff.mean():.3f}")
 
     # FAR resolution: with N negatives the smallest non-zero FAR is 1/N, and a
@@ -246,15 +556,10 @@ def main() -> int:
             "not a measurement. Use O(1e4-1e5) negatives to resolve a 0.1% FAR.")
 
     # Threshold sweep.
-    thresholds = np.linspace(-0.2, 1.0, 1201)
-    fars, frrs = zip(*(far_frr(same, diff, t) for t in thresholds))
-    fars, frrs = np.array(fars), np.array(frrs)
-
-    eer_idx = int(np.argmin(np.abs(fars - frrs)))
-    # Smallest threshold whose FAR meets the target (maximizes convenience).
-    meets = np.where(fars <= args.far_target)[0]
-    if len(meets):
-        rec_idx = int(meets[0])
+    thresholds = THRESHOLDS
+    fars, frrs, eer_idx = sweep(same, diff)
+    rec_idx = recommended_index(fars, args.far_target)
+    if rec_idx is not None:
         fell_back = False
     else:
         # No operating point meets the target FAR — fall back to EER, but say
@@ -298,8 +603,10 @@ def main() -> int:
     report = {
         "embedder": args.embedder.name,
         "subset": args.subset,
-        "pairs_evaluated": int(len(sims)),
+        "pairs_evaluated": int(evaluated),
         "pairs_skipped_no_face": int(skipped),
+        "input_scale": args.input_scale,
+        "detection": detection,
         "far_resolution": round(far_resolution, 6),
         "eer": point(eer_idx),
         "recommended": recommended,
@@ -309,6 +616,8 @@ def main() -> int:
             for t, f, r in zip(thresholds[::50], fars[::50], frrs[::50])
         ],
     }
+    if adaptive:
+        report["adaptive"] = adaptive
     out = HERE / "build/eval_report.json"
     out.write_text(json.dumps(report, indent=2))
     log(f"EER {report['eer']['far']:.3%} at threshold {report['eer']['threshold']}")
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""Reference 1:N gallery matcher for face check-in.
+
+Executable statement of the accept rule the kiosk applies (plan Section
+3, step 3): score the probe against every enrolled member, take each
+member's best sample (max over samples, like src/utils/faceMatch.js
+bestMatchScore), and accept the top-1 member only if its score clears
+`face_match_threshold` AND beats the runner-up member by the top1–top2
+margin. It exists so the rule can be benchmarked and swept offline; it is
+not wired into the app.
+
+Storage is one contiguous (capacity x dim) matrix of L2-normalized rows, so
+a batch of probes is scored with a single matmul and the top-k rows are
+picked with argpartition (O(N) rather than a full sort). Rows can be held as
+
+  float32  4 B/dim   exact
+  float16  2 B/dim   ~1e-4 cosine error
+  int8     1 B/dim   per-row symmetric scale, ~2e-3 cosine error
+
+float16/int8 rows are widened to float32 a block at a time while scoring, so
+only the storage shrinks — numpy has no fast half/int8 matmul. Enrolling
+appends rows (capacity doubles when full) and removing a member moves the
+last rows into its slots; neither rebuilds or re-normalizes the matrix.
+
+A member may have several samples (enrollment captures distinct poses).
+Among the top (most samples per member + 1) rows at least two distinct
+members appear whenever the gallery has two, so the runner-up member is
+always found without a per-member reduction over the whole gallery.
+
+Usage (as a library):
+  gallery = Gallery(dtype="int8")
+  gallery.enroll(member_id, embeddings)       # (n, 128) or (128,)
+  members, top1, runner_up, accepted = gallery.match(probes, threshold=0.55, margin=0.05)
+
+bench_gallery.py measures latency and memory of this engine from 100 to 100k
+members.
+"""
+
+import numpy as np
+
+EMBEDDING_DIM = 128
+# Server-side default of the face_match_threshold setting.
+DEFAULT_THRESHOLD = 0.55
+DTYPES = ("float32", "float16", "int8")
+# Rows widened to float32 per matmul for float16/int8 storage.
+_BLOCK_ROWS = 16384
+
+
+def normalize(embeddings: np.ndarray) -> np.ndarray:
+    """(n, dim) float32 L2-normalized copy; rejects zero or non-finite rows."""
+    x = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+    if not np.all(np.isfinite(x)):
+        raise ValueError("embeddings must be finite")
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    if np.any(norms == 0):
+        raise ValueError("zero-magnitude embedding cannot be scored")
+    return x / norms
+
+
+class Gallery:
+    """Contiguous gallery matrix with batched top-k search and the accept rule."""
+
+    def __init__(self, dim: int = EMBEDDING_DIM, dtype: str = "float32",
+                 capacity: int = 1024):
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype must be one of {DTYPES}, not {dtype!r}")
+        self.dim = dim
+        self.dtype = dtype
+        self._size = 0
+        self._rows = np.empty((max(capacity, 1), dim), dtype=dtype)
+        self._scales = np.empty(len(self._rows), np.float32) if dtype == "int8" else None
+        self._owners = np.empty(len(self._rows), np.int64)
+        self._member_rows: dict[int, list[int]] = {}
+        # samples-per-member -> number of members with that many
+        self._sample_counts: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def members(self) -> int:
+        return len(self._member_rows)
+
+    def __contains__(self, member_id: int) -> bool:
+        return member_id in self._member_rows
+
+    def nbytes(self) -> int:
+        """Bytes used by the live rows (matrix, scales, owner ids)."""
+        per_row = self._rows.itemsize * self.dim + self._owners.itemsize
+        if self._scales is not None:
+            per_row += self._scales.itemsize
+        return self._size * per_row
+
+    def allocated_nbytes(self) -> int:
+        """Bytes actually allocated, including unused capacity past the live rows."""
+        total = self._rows.nbytes + self._owners.nbytes
+        if self._scales is not None:
+            total += self._scales.nbytes
+        return total
+
+    def _count(self, samples: int, delta: int) -> None:
+        if samples:
+            left = self._sample_counts.get(samples, 0) + delta
+            if left:
+                self._sample_counts[samples] = left
+            else:
+                del self._sample_counts[samples]
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self._rows)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        rows = np.empty((capacity, self.dim), dtype=self.dtype)
+        rows[:self._size] = self._rows[:self._size]
+        self._rows = rows
+        owners = np.empty(capacity, np.int64)
+        owners[:self._size] = self._owners[:self._size]
+        self._owners = owners
+        if self._scales is not None:
+            scales = np.empty(capacity, np.float32)
+            scales[:self._size] = self._scales[:self._size]
+            self._scales = scales
+
+    def _store(self, start: int, unit: np.ndarray) -> None:
+        end = start + len(unit)
+        if self.dtype == "int8":
+            scale = np.abs(unit).max(axis=1) / 127.0
+            self._rows[start:end] = np.rint(unit / scale[:, None]).astype(np.int8)
+            self._scales[start:end] = scale
+        else:
+            self._rows[start:end] = unit
+
+    def enroll(self, member_id: int, embeddings: np.ndarray) -> None:
+        """Add one member's sample(s); appends to an already-enrolled member."""
+        unit = normalize(embeddings)
+        if unit.shape[1] != self.dim:
+            raise ValueError(f"expected {self.dim}-d embeddings, got {unit.shape[1]}")
+        start = self._size
+        self._grow(start + len(unit))
+        self._store(start, unit)
+        self._owners[start:start + len(unit)] = member_id
+        self._size += len(unit)
+        rows = self._member_rows.setdefault(member_id, [])
+        self._count(len(rows), -1)
+        rows.extend(range(start, start + len(unit)))
+        self._count(len(rows), +1)
+
+    def remove(self, member_id: int) -> bool:
+        """Drop every sample of a member; False if it was not enrolled."""
+        rows = self._member_rows.pop(member_id, None)
+        if rows is None:
+            return False
+        self._count(len(rows), -1)
+        # Highest slots first, so a moved-in last row never lands in a slot
+        # that is itself about to be vacated.
+        for row in sorted(rows, reverse=True):
+            last = self._size - 1
+            if row != last:
+                self._rows[row] = self._rows[last]
+                self._owners[row] = self._owners[last]
+                if self._scales is not None:
+                    self._scales[row] = self._scales[last]
+                moved = self._member_rows[int(self._owners[row])]
+                moved[moved.index(last)] = row
+            self._size -= 1
+        return True
+
+    def scores(self, probes: np.ndarray) -> np.ndarray:
+        """(n_probes, rows) cosine similarities of normalized probes to every row."""
+        unit = normalize(probes)
+        if self.dtype == "float32":
+            return unit @ self._rows[:self._size].T
+        out = np.empty((len(unit), self._size), np.float32)
+        for start in range(0, self._size, _BLOCK_ROWS):
+            end = min(start + _BLOCK_ROWS, self._size)
+            block = self._rows[start:end].astype(np.float32)
+            np.matmul(unit, block.T, out=out[:, start:end])
+            if self._scales is not None:
+                out[:, start:end] *= self._scales[start:end]
+        return out
+
+    def search(self, probes: np.ndarray, k: int = 5):
+        """Top-k rows per probe, best first: (member ids, scores), each (n, k)."""
+        if self._size == 0:
+            raise ValueError("gallery is empty")
+        sims = self.scores(probes)
+        k = min(k, self._size)
+        if k < self._size:
+            top = np.argpartition(sims, self._size - k, axis=1)[:, -k:]
+        else:
+            top = np.broadcast_to(np.arange(self._size), sims.shape)
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        return self._owners[top], np.take_along_axis(top_sims, order, axis=1)
+
+    def match(self, probes: np.ndarray, threshold: float = DEFAULT_THRESHOLD,
+              margin: float = 0.0):
+        """Apply the accept rule to each probe.
+
+        Returns (member ids, top-1 scores, runner-up scores, accepted) —
+        one entry per probe. The runner-up is the best score of any OTHER
+        member (-1 when only one member is enrolled), so a member's second
+        sample never counts against their own margin.
+        """
+        k = max(self._sample_counts, default=1) + 1
+        owners, sims = self.search(probes, k)
+        best = owners[:, 0]
+        # Rows come back best first: the first row owned by someone else is
+        # the runner-up member's best sample.
+        other = owners != best[:, None]
+        has_other = other.any(axis=1)
+        runner_up = np.where(has_other, sims[np.arange(len(sims)), other.argmax(axis=1)], -1.0)
+        top1 = sims[:, 0]
+        accepted = (top1 >= threshold) & (top1 - runner_up >= margin)
+        return best, top1, runner_up.astype(np.float32), accepted
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Replay biometric_access.log through the listener's processing pipeline
+
+Streams the JSONL log written by SimpleBiometricListener.log_event one line
+at a time and feeds each record's raw_message back through
+process_biometric_data: format sniffing, parsing, routing, member lookup
+and the handlers, exactly as a device message would go. The event type
+each replayed message produces is compared with the one recorded in the
+log, so a parser or routing change can be regression-tested offline
+against real traffic.
+
+Replayed events are captured in memory; nothing is appended to the log and
+no ACK leaves the process. Attendance writes stay off.
+
+  --speed 1     real time, using the gaps between the recorded timestamps
+  --speed 10    ten times faster than recorded
+  --speed 0     as fast as possible (default)
+
+Usage:
+  python3 tools/replay_biometric_log.py
+  python3 tools/replay_biometric_log.py /var/log/biometric_access.log --speed 0 --json
+  python3 tools/replay_biometric_log.py access.log --member-db data/data/gmgmt.sqlite --show-diffs 20
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from biometric_load_generator import percentile
+from biometric_member_cache import MemberCache
+from simple_tcp_listener import SimpleBiometricListener, configure_logging
+
+DEFAULT_LOG = os.path.join(tempfile.gettempdir(), 'biometric_access.log')
+
+
+class CaptureSocket:
+    """Stands in for the device socket; keeps the last ACK sent"""
+
+    def __init__(self):
+        self.last = None
+
+    def send(self, payload):
+        self.last = payload.decode('utf-8').rstrip('\r\n')
+        return len(payload)
+
+
+class ReplayListener(SimpleBiometricListener):
+    """Listener whose log_event records event types instead of writing the log"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.events = []
+
+    def log_event(self, event_type, data):
+        self.events.append(event_type)
+
+
+def read_records(path):
+    """Yield (line number, record) lazily; malformed lines yield (n, None)"""
+    stream = sys.stdin if path == '-' else open(path, encoding='utf-8', errors='replace')
+    try:
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield number, None
+                continue
+            yield number, record if isinstance(record, dict) else None
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def _recorded_at(record):
+    try:
+        return datetime.fromisoformat(record.get('timestamp', '')).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def replay(args, listener):
+    """Run the replay; returns the report dict"""
+    sock = CaptureSocket()
+    totals = {'records': 0, 'replayed': 0, 'malformed': 0, 'no_raw_message': 0}
+    diffs = {}
+    samples = []
+    acks = {}
+    latencies = []
+    first_recorded = None
+    started = time.perf_counter()
+
+    for number, record in read_records(args.log):
+        if args.limit and totals['replayed'] >= args.limit:
+            break
+        totals['records'] += 1
+        if record is None:
+            totals['malformed'] += 1
+            continue
+        data = record.get('data')
+        raw_message = data.get('raw_message') if isinstance(data, dict) else None
+        if not isinstance(raw_message, str):
+            totals['no_raw_message'] += 1
+            continue
+
+        if args.speed > 0:
+            recorded = _recorded_at(record)
+            if recorded is not None:
+                if first_recorded is None:
+                    first_recorded = recorded
+                delay = (recorded - first_recorded) / args.speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+
+        listener.events.clear()
+        message_started = time.perf_counter()
+        listener.process_biometric_data(raw_message, sock)
+        latencies.append(time.perf_counter() - message_started)
+        totals['replayed'] += 1
+        acks[sock.last] = acks.get(sock.last, 0) + 1
+
+        original = record.get('event_type')
+        replayed = listener.events[0] if listener.events else None
+        if replayed != original:
+            key = f"{original} -> {replayed}"
+            diffs[key] = diffs.get(key, 0) + 1
+            if len(samples) < args.show_diffs:
+                samples.append({'line': number, 'original': original, 'replayed': replayed,
+                                'ack': sock.last, 'raw_message': raw_message[:200]})
+
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'log': args.log,
+        'speed': args.speed or 'max',
+        **totals,
+        'elapsed_s': round(elapsed, 3),
+        'messages_per_sec': round(totals['replayed'] / elapsed, 1) if elapsed else 0.0,
+        'process_us': {
+            'p50': round(percentile(latencies, 50) * 1e6, 1) if latencies else None,
+            'p99': round(percentile(latencies, 99) * 1e6, 1) if latencies else None,
+        },
+        'event_type_diffs': sum(diffs.values()),
+        'diffs_by_transition': dict(sorted(diffs.items(), key=lambda item: -item[1])),
+        'diff_samples': samples,
+        'acks': dict(sorted(acks.items(), key=lambda item: str(item[0]))),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay biometric_access.log through the listener pipeline')
+    parser.add_argument('log', nargs='?', default=DEFAULT_LOG, help=f"JSONL event log, or - for stdin "
+                                                                    f"(default {DEFAULT_LOG})")
+    parser.add_argument('--speed', type=float, default=0.0,
+                        help='replay speed relative to the recorded timestamps (1 = real time, 0 = max)')
+    parser.add_argument('--limit', type=int, default=0, help='stop after this many replayed messages')
+    parser.add_argument('--member-db', help='check members/plans against this app database, '
+                                            'like the listener does (default: trust every match)')
+    parser.add_argument('--dedup-window', type=float, default=0.0,
+                        help='enable the listener dedup window (only meaningful with --speed 1)')
+    parser.add_argument('--show-diffs', type=int, default=10, help='how many mismatching records to include')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    # Handlers log every event at INFO; keep the replay output to the report
+    configure_logging(logging.ERROR)
+
+    member_cache = None
+    if args.member_db:
+        try:
+            member_cache = MemberCache(args.member_db)
+            member_cache.warm()
+        except (OSError, sqlite3.Error) as e:
+            parser.error(f"cannot open member database: {e}")
+
+    listener = ReplayListener(member_cache=member_cache, dedup_window=args.dedup_window)
+    try:
+        report = replay(args, listener)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    finally:
+        if member_cache:
+            member_cache.close()
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print(f"▶️  {report['replayed']:,} of {report['records']:,} records replayed from {report['log']} "
+              f"in {report['elapsed_s']} s ({report['messages_per_sec']:,.0f} msg/s, "
+              f"p50 {report['process_us']['p50']} us, p99 {report['process_us']['p99']} us)")
+        if report['malformed'] or report['no_raw_message']:
+            print(f"   skipped: {report['malformed']} malformed, {report['no_raw_message']} without raw_message")
+        print(f"   ACKs: {report['acks']}")
+        if report['event_type_diffs']:
+            print(f"❌ {report['event_type_diffs']} event type differences:")
+            for transition, count in report['diffs_by_transition'].items():
+                print(f"   {count:>8}  {transition}")
+            for sample in report['diff_samples']:
+                print(f"   line {sample['line']}: {sample['original']} -> {sample['replayed']} "
+                      f"({sample['ack']}) {sample['raw_message']}")
+        else:
+            print("✅ every replayed message produced its recorded event type")
+    return 1 if report['event_type_diffs'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,39 +4,373 @@ Simple TCP listener for ESP32 biometric devices
 Alternative implementation for testing or different deployment scenarios
 """
 
+import select
 import socket
+import sqlite3
 import threading
 import json
+import logging
+import random
+import re
+import time
+from collections import deque
 import xml.etree.ElementTree as ET
 import os
 import tempfile
 import platform
 from datetime import datetime
+from functools import lru_cache
+
+from biometric_attendance_writer import AttendanceWriter, event_row
+from biometric_connections import LIFETIME_BUCKETS, ConnectionTracker, enable_keepalive
+from biometric_member_cache import MemberCache, default_database_path
+from biometric_metrics import MetricsRegistry, start_metrics_server
+from biometric_work_pool import Lane, OrderedWorkPool
+from biometric_workers import WorkerSupervisor, workers_supported
+
+logger = logging.getLogger('biometric_listener')
+
+# First significant character a message must start with for each structured
+# parser to have any chance of succeeding. json.loads only accepts a value
+# starting with one of these; ET.fromstring needs a tag (optionally behind a
+# UTF-8 BOM, which str.strip() leaves in place).
+_JSON_START_CHARS = frozenset('{["-0123456789tfnNI')
+_XML_START_CHARS = frozenset('<\ufeff')
+
+# Lower-cased XML child tag / root attribute name -> canonical field name.
+_XML_ELEMENT_ALIASES = {
+    **dict.fromkeys(['userid', 'user_id', 'user', 'id', 'memberid', 'member_id'], 'userId'),
+    **dict.fromkeys(['status', 'access', 'result', 'auth_status', 'attendstat', 'attend_stat'], 'status'),
+    **dict.fromkeys(['deviceid', 'device_id', 'device', 'terminal', 'reader', 'terminalid', 'terminal_id'], 'deviceId'),
+    **dict.fromkeys(['timestamp', 'time', 'datetime', 'event_time'], 'timestamp'),
+    **dict.fromkeys(['messagetype', 'message_type', 'type', 'event_type', 'event'], 'messageType'),
+}
+_XML_ATTRIBUTE_ALIASES = {
+    **dict.fromkeys(['userid', 'user_id', 'user', 'id'], 'userId'),
+    **dict.fromkeys(['status', 'access', 'result'], 'status'),
+    **dict.fromkeys(['deviceid', 'device_id', 'device'], 'deviceId'),
+}
+# Descendant tags searched when the direct children didn't yield a value.
+_XML_NESTED_USER_TAGS = ('user', 'User', 'USER')
+_XML_NESTED_STATUS_TAGS = ('status', 'Status', 'access')
+_XML_NESTED_TAGS = frozenset(_XML_NESTED_USER_TAGS + _XML_NESTED_STATUS_TAGS)
+
+# Routing: messageType values that mean a time log, exact status values, and
+# the status substrings that mark an attendance event (clock in/out, etc.).
+_TIME_LOG_TYPES = frozenset(['timelog', 'time_log', 'attendance'])
+_STATUS_ROUTES = {
+    **dict.fromkeys(['authorized', '1', 'granted', 'allowed', 'access granted'], 'granted'),
+    **dict.fromkeys(['unauthorized', '0', 'denied', 'rejected', 'access denied'], 'denied'),
+}
+_ATTENDANCE_KEYWORDS = ('overtime', 'clock', 'checkin', 'checkout', 'break', 'lunch')
+# A partial line this long is handled as it is rather than buffered further.
+_MAX_FRAME_BYTES = 64 * 1024
+_UTF8_BOM = b'\xef\xbb\xbf'
+# XML prolog (declaration, comments, doctype) then the root element's name.
+_XML_ROOT_TAG = re.compile(rb'\s*(?:<\?.*?\?>\s*|<!--.*?-->\s*|<![^>]*>\s*)*<([^\s/>?!][^\s/>]*)', re.S)
+# How long unterminated data waits for more bytes before it is taken as a
+# whole message, on a connection that has not sent a newline yet.
+_UNTERMINATED_GRACE = 0.01
+# Route -> (handler method name, ACK sent back to the device).
+_ROUTE_HANDLERS = {
+    'time_log': ('handle_time_log', 'ACK:TIMELOG'),
+    'granted': ('handle_access_granted', 'ACK:GRANTED'),
+    'denied': ('handle_access_denied', 'ACK:DENIED'),
+    'attendance': ('handle_attendance_event', 'ACK:ATTENDANCE'),
+    'unknown': ('handle_unknown_message', 'ACK:UNKNOWN'),
+}
+
+
+def log(level, msg, *args, sampled=False, **fields):
+    """Log `msg` with structured `fields`; `sampled` records obey --log-sample.
+
+    Checks the level first so disabled per-message logging costs nothing.
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, msg, *args, extra={'fields': fields, 'sampled': sampled})
+
+
+class StructuredFormatter(logging.Formatter):
+    """Render records as text with trailing key=value fields, or as JSON lines
+
+    `context` fields (e.g. the worker index) are added to every record.
+    """
+
+    def __init__(self, json_output=False, context=None):
+        super().__init__()
+        self.json_output = json_output
+        self.context = context or {}
+
+    def format(self, record):
+        fields = getattr(record, 'fields', None) or {}
+        if self.context:
+            fields = {**self.context, **fields}
+        timestamp = datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds')
+        if self.json_output:
+            entry = {'ts': timestamp, 'level': record.levelname.lower(), 'msg': record.getMessage(), **fields}
+            if record.exc_info:
+                entry['exc'] = self.formatException(record.exc_info)
+            return json.dumps(entry, ensure_ascii=False, default=str)
+        line = f"{timestamp} {record.levelname:<7} {record.getMessage()}"
+        if fields:
+            line += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+
+class SampleFilter(logging.Filter):
+    """Pass only a fraction of records logged with sampled=True"""
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return not getattr(record, 'sampled', False) or self.rate >= 1.0 or random.random() < self.rate
+
+
+def configure_logging(level=logging.INFO, json_output=False, sample_rate=1.0, **context):
+    """Install the structured console handler on the listener's logger"""
+    handler = logging.StreamHandler()
+    handler.setFormatter(StructuredFormatter(json_output, context))
+    handler.addFilter(SampleFilter(sample_rate))
+    logger.handlers[:] = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+class DuplicateWindow:
+    """Remembers recently handled scans so reader resends can be short-circuited
+
+    A dict maps each key to (accepted_at, ack) and a FIFO of (accepted_at,
+    key) expires entries in arrival order, so insert, lookup and expiry are
+    all O(1) amortized. The window runs from the first accepted copy; resends
+    inside it don't extend it, so a held finger still produces one event per
+    window rather than being suppressed forever.
+    """
+
+    def __init__(self, window=1.0):
+        self.window = window
+        self._entries = {}
+        self._order = deque()
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        cutoff = now - self.window
+        order, entries = self._order, self._entries
+        while order and order[0][0] <= cutoff:
+            accepted_at, key = order.popleft()
+            # Only drop it if it wasn't re-accepted after expiring once already
+            if entries.get(key, (None,))[0] == accepted_at:
+                del entries[key]
+
+    def check(self, key, now):
+        """ACK sent for `key` within the window, or None"""
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(key)
+            return entry[1] if entry else None
+
+    def remember(self, key, ack, now):
+        with self._lock:
+            self._entries[key] = (now, ack)
+            self._order.append((now, key))
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ListenerMetrics:
+    """Counters and histograms exported on the metrics endpoint"""
+
+    def __init__(self, registry=None):
+        self.registry = registry or MetricsRegistry()
+        r = self.registry
+        self.connections = r.counter('biometric_connections_total', 'Device connections accepted')
+        self.connections_active = r.gauge('biometric_connections_active', 'Device connections currently open')
+        self.messages = r.counter('biometric_messages_total', 'Messages received, by detected format', ['format'])
+        self.parse_failures = r.counter('biometric_parse_failures_total', 'Messages no parser recognized')
+        self.processing_errors = r.counter('biometric_processing_errors_total', 'Messages answered with ACK:ERROR')
+        self.handler_seconds = r.histogram('biometric_handler_seconds', 'Handler latency in seconds', ['handler'])
+        self.acks = r.counter('biometric_acks_total', 'Responses sent to devices, by ACK type', ['ack'])
+        self.inflight = r.gauge('biometric_messages_inflight', 'Messages currently being parsed or handled')
+        self.duplicates = r.counter('biometric_duplicates_total',
+                                    'Repeated scans answered from the dedup window without handling')
+        self.attendance_write_seconds = r.histogram('biometric_attendance_write_seconds',
+                                                    'Time a handler waited for its attendance event to commit')
+        self.attendance_queue_depth = r.gauge('biometric_attendance_queue_depth',
+                                              'Attendance events waiting for the group-commit writer')
+        self.queue_wait_seconds = r.histogram('biometric_queue_wait_seconds',
+                                              'Time a framed message waited for a handler thread')
+        self.work_queue_depth = r.gauge('biometric_work_queue_depth', 'Messages waiting for a handler thread')
+        self.backpressure = r.counter('biometric_backpressure_total',
+                                      'Messages that met a full work queue, by action taken', ['action'])
+        self.connection_lifetime_seconds = r.histogram('biometric_connection_lifetime_seconds',
+                                                       'How long device connections stayed open, by close reason',
+                                                       ['reason'], buckets=LIFETIME_BUCKETS)
+
+
+@lru_cache(maxsize=1024)
+def _route_for_status(status):
+    """Map a lower-cased status to a route name (memoized per distinct status)"""
+    route = _STATUS_ROUTES.get(status)
+    if route:
+        return route
+    if any(keyword in status for keyword in _ATTENDANCE_KEYWORDS):
+        return 'attendance'
+    return 'unknown'
+
+
+def _wait_readable(sock, timeout):
+    """Whether `sock` has data (or EOF) within `timeout` seconds"""
+    if hasattr(select, 'poll'):
+        # poll() has no FD_SETSIZE limit, unlike select() with thousands of devices
+        poller = select.poll()
+        poller.register(sock, select.POLLIN)
+        return bool(poller.poll(timeout * 1000))
+    return bool(select.select([sock], [], [], timeout)[0])
+
+
+def _document_incomplete(frame):
+    """Whether `frame` starts a JSON or XML document that doesn't parse yet
+
+    Most lines are whole documents, and the handler parses them anyway, so
+    the full parse only runs when the line doesn't end the way its document
+    must (see _document_may_end).
+    """
+    text = frame.lstrip()
+    if text.startswith(_UTF8_BOM):
+        text = text[len(_UTF8_BOM):]
+    return (text[:1] in (b'{', b'[', b'<') and not _document_may_end(frame)
+            and not _document_complete(frame))
+
+
+def _xml_root_start(text):
+    """(tag, offset) of the first element in `text`, skipping the prolog; (None, -1) if none yet"""
+    match = _XML_ROOT_TAG.match(text)
+    if match is None:
+        return None, -1
+    return match.group(1), match.start(1) - 1
+
+
+def _document_may_end(frame):
+    """Cheap check: whether `frame` ends the way the document it opens must
+
+    JSON must end with its opening bracket's partner, XML with the root
+    element's end tag (or be a lone self-closing root). A miss means the
+    document is certainly unfinished; a hit still needs _document_complete
+    where a wrong guess matters.
+    """
+    text = frame.strip()
+    if text.startswith(_UTF8_BOM):
+        text = text[len(_UTF8_BOM):]
+    opener = text[:1]
+    if opener == b'{':
+        return text.endswith(b'}')
+    if opener == b'[':
+        return text.endswith(b']')
+    if not text.endswith(b'>'):
+        return False
+    root, root_start = _xml_root_start(text)
+    if root is None:
+        return False
+    last = text.rfind(b'<')
+    if text.startswith(b'</', last):
+        return text[last + 2:-1].strip() == root
+    return last == root_start and text.endswith(b'/>')
+
+
+def _document_complete(frame):
+    """Whether `frame` parses as a whole JSON or XML document"""
+    text = frame.decode('utf-8', 'replace').strip()
+    if text[:1] in ('{', '['):
+        try:
+            json.loads(text)
+        except ValueError:
+            return False
+        return True
+    try:
+        ET.fromstring(text)
+    except (ET.ParseError, ValueError):
+        return False
+    return True
+
+
+def _first_populated(*elems):
+    """Equivalent of ``a or b or c`` over find() results.
+
+    An Element's truth value is whether it has children, so the chain skips
+    childless matches and falls through to the last candidate.
+    """
+    for elem in elems[:-1]:
+        if elem is not None and len(elem):
+            return elem
+    return elems[-1]
+
 
 class SimpleBiometricListener:
-    def __init__(self, host='0.0.0.0', port=5005):
+    def __init__(self, host='0.0.0.0', port=5005, metrics_port=None, metrics_host='127.0.0.1',
+                 member_cache=None, attendance_writer=None, attendance_timeout=5.0, dedup_window=1.0,
+                 reuse_port=False, handler_threads=16, max_queue=1000, overload='pause', read_timeout=0.5,
+                 idle_timeout=3600.0, keepalive=(60, 10, 5)):
         self.host = host
         self.port = port
+        self.reuse_port = reuse_port
+        if overload not in ('pause', 'busy'):
+            raise ValueError(f"overload must be 'pause' or 'busy', not {overload!r}")
+        self.handler_threads = handler_threads
+        self.max_queue = max_queue
+        self.overload = overload
+        self.read_timeout = read_timeout
+        # (idle seconds, probe interval, probe count), or None to leave keepalive off
+        self.keepalive = keepalive
+        self.tracker = ConnectionTracker(idle_timeout)
+        self.pool = None
+        self.duplicates = DuplicateWindow(dedup_window) if dedup_window > 0 else None
+        self.member_cache = member_cache
+        self.attendance_writer = attendance_writer
+        self.attendance_timeout = attendance_timeout
+        self.metrics = ListenerMetrics()
+        self.metrics_host = metrics_host
+        self.metrics_port = metrics_port
+        self.metrics_server = None
         self.socket = None
         self.running = False
+        # Open device connections -> their handler threads, for draining on stop
+        self.clients = {}
+        self.clients_lock = threading.Lock()
         
     def start(self):
         """Start the TCP listener"""
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.reuse_port:
+            # Sibling workers bind the same port; the kernel balances connections between them
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         
         try:
             self.socket.bind((self.host, self.port))
-            self.socket.listen(5)
+            self.socket.listen(socket.SOMAXCONN)
             self.running = True
             
-            print(f"🔐 Biometric listener started on {self.host}:{self.port}")
-            print("📡 Waiting for ESP32 device connections...")
+            self.pool = OrderedWorkPool(self._handle_queued, self._reject_queued, self.handler_threads,
+                                        self.max_queue).start()
+            self.tracker.start()
+            log(logging.INFO, "🔐 Biometric listener started on %s:%s", self.host, self.port,
+                handler_threads=self.handler_threads, max_queue=self.max_queue, overload=self.overload)
+            if self.metrics_port:
+                self.metrics_server = start_metrics_server(self.metrics.registry, self.metrics_host, self.metrics_port)
+                log(logging.INFO, "📈 Metrics at http://%s:%s/metrics", self.metrics_host, self.metrics_port)
+            log(logging.INFO, "📡 Waiting for ESP32 device connections...")
             
             while self.running:
                 try:
                     client_socket, address = self.socket.accept()
-                    print(f"📱 Device connected from {address}")
+                    self.metrics.connections.inc()
+                    log(logging.INFO, "📱 Device connected from %s", address)
+                    if self.keepalive:
+                        enable_keepalive(client_socket, *self.keepalive)
                     
                     # Handle client in a separate thread
                     client_thread = threading.Thread(
@@ -44,93 +378,273 @@ class SimpleBiometricListener:
                         args=(client_socket, address)
                     )
                     client_thread.daemon = True
+                    with self.clients_lock:
+                        self.clients[client_socket] = client_thread
                     client_thread.start()
                     
                 except socket.error as e:
                     if self.running:
-                        print(f"❌ Socket error: {e}")
+                        log(logging.ERROR, "❌ Socket error: %s", e)
                         
         except Exception as e:
-            print(f"❌ Failed to start listener: {e}")
+            log(logging.ERROR, "❌ Failed to start listener: %s", e)
         finally:
             if self.socket:
                 self.socket.close()
     
     def handle_client(self, client_socket, address):
-        """Handle individual client connections"""
+        """Read one device's messages and queue them for the handler pool"""
+        self.metrics.connections_active.inc()
+        lane = Lane()
+        conn = self.tracker.open(client_socket, address)
+        reason = 'eof'
         try:
-            while self.running:
-                data = client_socket.recv(1024)
-                if not data:
-                    break
-                    
-                message = data.decode('utf-8').strip()
-                print(f"📨 Received from {address} at {datetime.now().strftime('%H:%M:%S.%f')[:-3]}: {message[:100]}{'...' if len(message) > 100 else ''}")
-                if len(message) > 200:
-                    print(f"📝 Full message length: {len(message)} characters")
-                
-                # Process the biometric data
-                self.process_biometric_data(message, client_socket)
+            for frame in self.read_frames(client_socket, conn):
+                message = frame.decode('utf-8', 'replace').strip()
+                if not message:
+                    continue
+                conn.messages += 1
+                log(logging.DEBUG, "📨 Received from %s: %s%s", address, message[:100],
+                    '...' if len(message) > 100 else '', sampled=True, length=len(message))
+                self.dispatch(lane, message, client_socket)
                 
         except Exception as e:
-            print(f"❌ Error handling client {address}: {e}")
+            reason = 'error'
+            log(logging.ERROR, "❌ Error handling client %s: %s", address, e)
         finally:
+            # Messages already queued still get their ACKs before the socket closes
+            self.pool.wait_idle(lane)
+            with self.clients_lock:
+                self.clients.pop(client_socket, None)
             client_socket.close()
-            print(f"📱 Device {address} disconnected")
+            self.metrics.connections_active.dec()
+            lifetime, reason = self.tracker.close(conn, reason if self.running else 'shutdown')
+            self.metrics.connection_lifetime_seconds.observe(lifetime, reason)
+            log(logging.INFO, "📱 Device %s disconnected", address, reason=reason,
+                lifetime_s=round(lifetime, 1), messages=conn.messages)
+    
+    def read_frames(self, client_socket, conn=None):
+        """Yield raw messages from a connection's byte stream
+        
+        Newline-terminated messages are split out however TCP segmented
+        them. Devices that don't terminate their messages send one per
+        write, so unterminated data that is followed by silence is a whole
+        message: after _UNTERMINATED_GRACE until the connection has sent a
+        newline, after read_timeout once it has shown it uses them.
+        
+        A line that opens a JSON or XML document which doesn't parse yet
+        (pretty-printed JSON, an XML declaration on its own line) is held
+        and the following lines are added until the document parses, so a
+        multi-line document is still one message. If it hasn't closed after
+        read_timeout (of silence, or since it opened), the held lines are
+        yielded one by one as plain newline framing would have; so are
+        they once they reach _MAX_FRAME_BYTES.
+        Every recv() marks `conn` active for the idle reaper.
+        """
+        buffer = b''
+        document = []  # lines of a JSON/XML document that has not closed yet
+        document_bytes = 0
+        document_deadline = 0.0
+        flush_after = _UNTERMINATED_GRACE
+        while self.running:
+            # An open document is worth waiting read_timeout for its next segment
+            wait = self.read_timeout if document else flush_after
+            if (buffer or document) and not _wait_readable(client_socket, wait):
+                if document:
+                    whole = b'\n'.join(document + [buffer]) if buffer else b'\n'.join(document)
+                    if _document_complete(whole):
+                        yield whole
+                    else:
+                        yield from document
+                        if buffer:
+                            yield buffer
+                    document = []
+                elif buffer:
+                    yield buffer
+                buffer = b''
+                continue
+            data = client_socket.recv(4096)
+            if not data:
+                break
+            if conn is not None:
+                conn.last_activity = time.monotonic()
+            buffer += data
+            if b'\n' in buffer:
+                *lines, buffer = buffer.split(b'\n')
+                for line in lines:
+                    if document:
+                        document.append(line)
+                        document_bytes += len(line) + 1
+                        joined = b'\n'.join(document)
+                        if not (_document_may_end(joined) and _document_complete(joined)):
+                            continue
+                        line = joined
+                        document = []
+                    elif _document_incomplete(line):
+                        document = [line]
+                        document_bytes = len(line)
+                        document_deadline = time.monotonic() + self.read_timeout
+                        continue
+                    flush_after = self.read_timeout
+                    yield line
+            if document:
+                # The closing line may be the unterminated tail of the write
+                whole = b'\n'.join(document + [buffer]) if buffer else None
+                if whole and _document_may_end(whole) and _document_complete(whole):
+                    yield whole
+                    document, buffer = [], b''
+                elif time.monotonic() >= document_deadline or document_bytes >= _MAX_FRAME_BYTES:
+                    # Not a document after all: keep a steady stream (or an
+                    # endless one) from piling onto it
+                    yield from document
+                    document = []
+            if len(buffer) >= _MAX_FRAME_BYTES:
+                yield buffer
+                buffer = b''
+        if document:
+            yield from document
+        if buffer:
+            yield buffer
+    
+    def dispatch(self, lane, message, client_socket):
+        """Queue a message on its connection's lane, applying the overload policy
+        
+        'pause' blocks this reader until the queue has room, so the device
+        is slowed down by TCP flow control; 'busy' answers ACK:BUSY at once.
+        """
+        pool = self.pool
+        if pool.depth() >= pool.max_queue:
+            self.metrics.backpressure.inc(self.overload)
+        if not pool.submit(lane, (message, client_socket), block=self.overload == 'pause'):
+            self._reject_queued((message, client_socket))
+            return
+        self.metrics.work_queue_depth.set(pool.depth())
+    
+    def _handle_queued(self, item, waited):
+        self.metrics.work_queue_depth.set(self.pool.depth())
+        self.metrics.queue_wait_seconds.observe(waited)
+        self.process_biometric_data(*item)
+    
+    def _reject_queued(self, item):
+        self.send_response(item[1], "ACK:BUSY")
     
     def process_biometric_data(self, message, client_socket):
         """Process incoming biometric data"""
+        metrics = self.metrics
+        metrics.inflight.inc()
         try:
             timestamp = datetime.now().isoformat()
             
             # Parse different message formats
-            biometric_data = self.parse_message(message)
+            message_format, biometric_data = self._parse_message(message)
+            metrics.messages.inc(message_format)
+            if message_format == 'default':
+                metrics.parse_failures.inc()
             biometric_data['timestamp'] = timestamp
             biometric_data['raw_message'] = message
             
-            print(f"🔍 Parsed data: {json.dumps(biometric_data, indent=2)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                log(logging.DEBUG, "🔍 Parsed data: %s", json.dumps(biometric_data, ensure_ascii=False),
+                    sampled=True, format=message_format)
+            
+            route = self.route_message(biometric_data)
             
-            # Determine action based on status and message type
-            status = biometric_data.get('status', '').lower()
-            message_type = biometric_data.get('messageType', '').lower()
+            # Readers often resend the same match within a second; answer
+            # those with the original ACK and skip handling and logging
+            dedup_key = self._dedup_key(biometric_data, route, client_socket)
+            if dedup_key is not None:
+                now = time.monotonic()
+                previous_ack = self.duplicates.check(dedup_key, now)
+                if previous_ack:
+                    metrics.duplicates.inc()
+                    log(logging.DEBUG, "🔁 Duplicate scan suppressed", sampled=True, userId=dedup_key[1],
+                        deviceId=dedup_key[0])
+                    self.send_response(client_socket, previous_ack)
+                    return
             
-            # Handle time logging events (common in biometric systems)
-            if message_type in ['timelog', 'time_log', 'attendance']:
-                self.handle_time_log(biometric_data)
-                self.send_response(client_socket, "ACK:TIMELOG")
-            # Handle access control events (authorized status or valid userId with no status)
-            elif (status in ['authorized', '1', 'granted', 'allowed', 'access granted'] or 
-                  (biometric_data.get('userId') and not status)):
-                self.handle_access_granted(biometric_data)
-                self.send_response(client_socket, "ACK:GRANTED")
-            elif status in ['unauthorized', '0', 'denied', 'rejected', 'access denied']:
-                self.handle_access_denied(biometric_data)
-                self.send_response(client_socket, "ACK:DENIED")
-            # Handle attendance status events (clock in/out, overtime, etc.)
-            elif any(keyword in status for keyword in ['overtime', 'clock', 'checkin', 'checkout', 'break', 'lunch']):
-                self.handle_attendance_event(biometric_data)
-                self.send_response(client_socket, "ACK:ATTENDANCE")
-            else:
-                self.handle_unknown_message(biometric_data)
-                self.send_response(client_socket, "ACK:UNKNOWN")
+            handler_name, ack = _ROUTE_HANDLERS[route]
+            started = time.perf_counter()
+            # A handler may override the route's ACK (e.g. a member lookup denies entry)
+            ack = getattr(self, handler_name)(biometric_data) or ack
+            metrics.handler_seconds.observe(time.perf_counter() - started, handler_name)
+            if dedup_key is not None and ack != "ACK:ERROR":
+                self.duplicates.remember(dedup_key, ack, now)
+            self.send_response(client_socket, ack)
                 
         except Exception as e:
-            print(f"❌ Error processing biometric data: {e}")
+            metrics.processing_errors.inc()
+            log(logging.ERROR, "❌ Error processing biometric data: %s", e)
             self.send_response(client_socket, "ACK:ERROR")
+        finally:
+            metrics.inflight.dec()
+    
+    def _dedup_key(self, biometric_data, route, client_socket):
+        """(deviceId, userId, status, route) for scans that identify a user, else None
+
+        The route is part of the key because messageType alone can change it
+        (a time log vs. an access event with the same status). Messages
+        without a deviceId (3-field CSV, short colon form, JSON without it)
+        are keyed by their connection instead, so the same member at two
+        doors isn't answered with the other door's ACK and left unlogged.
+        """
+        if self.duplicates is None or not biometric_data.get('userId'):
+            return None
+        device = biometric_data.get('deviceId')
+        if device is None:
+            try:
+                device = ('peer', client_socket.getpeername())
+            except (AttributeError, OSError):
+                device = ('connection', id(client_socket))
+        key = (device, biometric_data.get('userId'), biometric_data.get('status'), route)
+        try:
+            hash(key)
+        except TypeError:
+            return None  # list/dict values from an odd JSON payload
+        return key
+    
+    def route_message(self, biometric_data):
+        """Pick the route (key of _ROUTE_HANDLERS) for a parsed message"""
+        # Determine action based on status and message type
+        status = biometric_data.get('status', '').lower()
+        message_type = biometric_data.get('messageType', '').lower()
+        
+        # Handle time logging events (common in biometric systems)
+        if message_type in _TIME_LOG_TYPES:
+            return 'time_log'
+        # A valid userId with no status counts as an access-granted event
+        if not status and biometric_data.get('userId'):
+            return 'granted'
+        return _route_for_status(status)
     
     def parse_message(self, message):
         """Parse different message formats"""
+        return self._parse_message(message)[1]
+    
+    def _parse_message(self, message):
+        """Parse a message, returning (format name, parsed data)"""
         cleaned_message = message.strip().rstrip('\x00').strip()
         
-        print(f"🔍 Parsing message (length: {len(message)} -> {len(cleaned_message)} after cleaning)")
-        print(f"📄 Message preview: {cleaned_message[:100]}..." if len(cleaned_message) > 100 else f"📄 Full message: {cleaned_message}")
+        log(logging.DEBUG, "🔍 Parsing message (length: %d -> %d after cleaning)", len(message), len(cleaned_message))
         
-        # Try different parsing methods in order
-        return (self._try_json_parse(cleaned_message) or
-                self._try_xml_parse(cleaned_message) or
-                self._try_csv_parse(message) or
-                self._try_colon_parse(message) or
-                self._default_parse())
+        # Sniff the first significant character so only parsers that can
+        # succeed are attempted; the fallback order is otherwise unchanged
+        # (JSON, XML, CSV, colon), including falling through on empty results.
+        first_char = cleaned_message[:1]
+        if first_char in _JSON_START_CHARS:
+            data = self._try_json_parse(cleaned_message)
+            if data:
+                return 'json', data
+        if first_char in _XML_START_CHARS:
+            data = self._try_xml_parse(cleaned_message)
+            if data:
+                return 'xml', data
+        data = self._try_csv_parse(message)
+        if data:
+            return 'csv', data
+        data = self._try_colon_parse(message)
+        if data:
+            return 'colon', data
+        return 'default', self._default_parse()
     
     def _try_json_parse(self, message):
         """Try to parse as JSON"""
@@ -151,66 +665,60 @@ class SimpleBiometricListener:
             self._extract_nested_xml(root, xml_data)
             
             # Handle simple text content
-            if not list(root) and root.text:
+            if not len(root) and root.text:
                 xml_data['messageType'] = root.tag
                 xml_data['content'] = root.text
             
-            self._debug_xml_results(xml_data)
+            if logger.isEnabledFor(logging.DEBUG):
+                self._debug_xml_results(xml_data)
             return xml_data
             
         except ET.ParseError as e:
-            print(f"⚠️  XML parsing failed: {e}")
+            log(logging.DEBUG, "⚠️  XML parsing failed: %s", e)
             return None
     
     def _extract_xml_elements(self, root, xml_data):
         """Extract data from XML child elements"""
         for child in root:
             tag_name = child.tag.lower()
-            if tag_name in ['userid', 'user_id', 'user', 'id', 'memberid', 'member_id']:
-                xml_data['userId'] = child.text
-            elif tag_name in ['status', 'access', 'result', 'auth_status', 'attendstat', 'attend_stat']:
-                xml_data['status'] = child.text
-            elif tag_name in ['deviceid', 'device_id', 'device', 'terminal', 'reader', 'terminalid', 'terminal_id']:
-                xml_data['deviceId'] = child.text
-            elif tag_name in ['timestamp', 'time', 'datetime', 'event_time']:
-                xml_data['timestamp'] = child.text
-            elif tag_name in ['messagetype', 'message_type', 'type', 'event_type', 'event']:
-                xml_data['messageType'] = child.text
-            else:
-                xml_data[tag_name] = child.text
+            xml_data[_XML_ELEMENT_ALIASES.get(tag_name, tag_name)] = child.text
     
     def _extract_xml_attributes(self, root, xml_data):
         """Extract data from XML attributes"""
         for attr_name, attr_value in root.attrib.items():
-            attr_name_lower = attr_name.lower()
-            if attr_name_lower in ['userid', 'user_id', 'user', 'id']:
-                xml_data['userId'] = attr_value
-            elif attr_name_lower in ['status', 'access', 'result']:
-                xml_data['status'] = attr_value
-            elif attr_name_lower in ['deviceid', 'device_id', 'device']:
-                xml_data['deviceId'] = attr_value
+            field = _XML_ATTRIBUTE_ALIASES.get(attr_name.lower())
+            if field:
+                xml_data[field] = attr_value
     
     def _extract_nested_xml(self, root, xml_data):
         """Extract data from nested XML elements"""
-        if not xml_data.get('userId'):
-            user_elem = root.find('.//user') or root.find('.//User') or root.find('.//USER')
+        need_user = not xml_data.get('userId')
+        need_status = not xml_data.get('status')
+        if not (need_user or need_status):
+            return
+        
+        # One pass over the descendants instead of a find() per candidate tag
+        found = {}
+        descendants = root.iter()
+        next(descendants)  # root itself; .//tag only matches below it
+        for elem in descendants:
+            if elem.tag in _XML_NESTED_TAGS and elem.tag not in found:
+                found[elem.tag] = elem
+        
+        if need_user:
+            user_elem = _first_populated(*(found.get(tag) for tag in _XML_NESTED_USER_TAGS))
             if user_elem is not None:
                 xml_data['userId'] = user_elem.text or user_elem.get('id')
         
-        if not xml_data.get('status'):
-            status_elem = root.find('.//status') or root.find('.//Status') or root.find('.//access')
+        if need_status:
+            status_elem = _first_populated(*(found.get(tag) for tag in _XML_NESTED_STATUS_TAGS))
             if status_elem is not None:
                 xml_data['status'] = status_elem.text
     
     def _debug_xml_results(self, xml_data):
-        """Print XML parsing debug information"""
-        print(f"🔍 XML parsed successfully. Extracted fields: {list(xml_data.keys())}")
-        if xml_data.get('userId'):
-            print(f"👤 User ID: {xml_data['userId']}")
-        if xml_data.get('status'):
-            print(f"📊 Status: {xml_data['status']}")
-        if xml_data.get('deviceId'):
-            print(f"🖥️  Device ID: {xml_data['deviceId']}")
+        """Log XML parsing debug information"""
+        log(logging.DEBUG, "🔍 XML parsed successfully", extracted=list(xml_data.keys()),
+            userId=xml_data.get('userId'), status=xml_data.get('status'), deviceId=xml_data.get('deviceId'))
     
     def _try_csv_parse(self, message):
         """Try to parse as comma-separated values"""
@@ -244,24 +752,46 @@ class SimpleBiometricListener:
             'deviceId': None,
         }
     
+    def lookup_member(self, data):
+        """Attach the member lookup result to `data`; returns (allowed, reason)
+
+        Without a member cache every sensor match is trusted, as before.
+        """
+        if self.member_cache is None:
+            return True, None
+        allowed, reason, member = self.member_cache.access_decision(data.get('userId'))
+        data['member'] = {
+            'id': member.member_id if member else None,
+            'name': member.name if member else None,
+            'allowed': allowed,
+            'reason': reason,
+        }
+        return allowed, reason
+    
     def handle_access_granted(self, data):
         """Handle authorized access"""
         user_id = data.get('userId', 'Unknown')
-        print(f"✅ ACCESS GRANTED for user: {user_id}")
+        allowed, reason = self.lookup_member(data)
+        if not allowed:
+            log(logging.INFO, "🚫 ACCESS REFUSED for user: %s (%s)", user_id, reason, sampled=True,
+                deviceId=data.get('deviceId'))
+            self.log_event('ACCESS_DENIED', data)
+            return "ACK:DENIED"
+        
+        log(logging.INFO, "✅ ACCESS GRANTED for user: %s", user_id, sampled=True, deviceId=data.get('deviceId'),
+            member=data.get('member', {}).get('name'))
         
         # Here you would:
-        # 1. Look up member in database
-        # 2. Check active membership
-        # 3. Log attendance
-        # 4. Trigger door unlock
-        # 5. Send welcome message
+        # 1. Log attendance
+        # 2. Trigger door unlock
+        # 3. Send welcome message
         
         self.log_event('ACCESS_GRANTED', data)
     
     def handle_access_denied(self, data):
         """Handle unauthorized access"""
         user_id = data.get('userId', 'Unknown')
-        print(f"❌ ACCESS DENIED for user: {user_id}")
+        log(logging.INFO, "❌ ACCESS DENIED for user: %s", user_id, sampled=True, deviceId=data.get('deviceId'))
         
         # Here you would:
         # 1. Log security event
@@ -277,16 +807,16 @@ class SimpleBiometricListener:
         status = data.get('status', 'Unknown')
         device_id = data.get('deviceId', 'Unknown')
         
-        print(f"⏰ TIME LOG - User: {user_id}, Status: {status}, Device: {device_id}")
+        self.lookup_member(data)
+        log(logging.INFO, "⏰ TIME LOG - User: %s, Status: %s, Device: %s", user_id, status, device_id, sampled=True)
         
         # Here you would:
-        # 1. Look up member in database
-        # 2. Log attendance/time entry
-        # 3. Calculate work hours
-        # 4. Update attendance records
-        # 5. Check for overtime rules
+        # 1. Calculate work hours
+        # 2. Update attendance records
+        # 3. Check for overtime rules
         
         self.log_event('TIME_LOG', data)
+        return self.record_attendance('time_log', data)
     
     def handle_attendance_event(self, data):
         """Handle attendance-related events (clock in/out, breaks, etc.)"""
@@ -294,7 +824,8 @@ class SimpleBiometricListener:
         status = data.get('status', 'Unknown')
         device_id = data.get('deviceId', 'Unknown')
         
-        print(f"📋 ATTENDANCE EVENT - User: {user_id}, Status: {status}, Device: {device_id}")
+        self.lookup_member(data)
+        log(logging.INFO, "📋 ATTENDANCE EVENT - User: %s, Status: %s, Device: %s", user_id, status, device_id, sampled=True)
         
         # Here you would:
         # 1. Parse attendance action (clock in, clock out, break start, etc.)
@@ -304,10 +835,30 @@ class SimpleBiometricListener:
         # 5. Update payroll systems if needed
         
         self.log_event('ATTENDANCE_EVENT', data)
+        return self.record_attendance('attendance_event', data)
+    
+    def record_attendance(self, event_type, data):
+        """Persist the event through the group-commit writer and wait for it
+
+        Returns None once committed (the route's ACK stands) or ACK:ERROR so
+        the device knows the scan was not stored.
+        """
+        if self.attendance_writer is None:
+            return None
+        started = time.perf_counter()
+        try:
+            self.attendance_writer.write(event_row(event_type, data), timeout=self.attendance_timeout)
+        except Exception as e:
+            log(logging.ERROR, "❌ Attendance write failed: %s", e, userId=data.get('userId'))
+            return "ACK:ERROR"
+        finally:
+            self.metrics.attendance_write_seconds.observe(time.perf_counter() - started)
+            self.metrics.attendance_queue_depth.set(self.attendance_writer.queue_depth())
+        return None
     
     def handle_unknown_message(self, data):
         """Handle unknown message format"""
-        print(f"❓ UNKNOWN MESSAGE: {data.get('raw_message', '')}")
+        log(logging.INFO, "❓ UNKNOWN MESSAGE: %s", data.get('raw_message', ''), sampled=True)
         self.log_event('UNKNOWN_MESSAGE', data)
     
     def log_event(self, event_type, data):
@@ -362,7 +913,7 @@ class SimpleBiometricListener:
                 
                 # If successful, log the path being used (only on first successful write)
                 if not hasattr(self, '_log_path_announced'):
-                    print(f"📁 Logging to: {log_path}")
+                    log(logging.INFO, "📁 Logging to: %s", log_path)
                     self._log_path_announced = True
                 
                 # Break out of the loop on success
@@ -371,9 +922,8 @@ class SimpleBiometricListener:
             except (OSError, IOError, UnicodeError) as e:
                 # If this is the last path, print the error
                 if log_path == log_paths[-1]:
-                    print("⚠️  Warning: Could not write to any log file location")
-                    print(f"❌ Last error: {e}")
-                    print(f"📝 Log entry: {json.dumps(log_entry, ensure_ascii=False)}")
+                    log(logging.WARNING, "⚠️  Could not write to any log file location: %s", e,
+                        entry=json.dumps(log_entry, ensure_ascii=False))
                 else:
                     # Try next path silently
                     continue
@@ -382,37 +932,185 @@ class SimpleBiometricListener:
         """Send response back to device"""
         try:
             client_socket.send(f"{response}\r\n".encode('utf-8'))
+            self.metrics.acks.inc(response)
         except Exception as e:
-            print(f"❌ Error sending response: {e}")
+            log(logging.WARNING, "❌ Error sending response: %s", e)
     
-    def stop(self):
-        """Stop the listener"""
-        print("🛑 Stopping biometric listener...")
-        self.running = False
+    def stop(self, drain_timeout=0.0):
+        """Stop the listener
+
+        With a drain_timeout, stop accepting, let every connection finish
+        (and ACK) the message it is handling, then close it; attendance
+        writes are flushed after that so drained events are still committed.
+        """
+        was_running, self.running = self.running, False
+        if was_running:
+            log(logging.INFO, "🛑 Stopping biometric listener...")
         if self.socket:
             self.socket.close()
+        if was_running and drain_timeout > 0:
+            self.drain(drain_timeout)
+        if self.pool and was_running:
+            self.pool.close()
+        self.tracker.stop()
+        if was_running:
+            for host, stats in self.tracker.device_stats().items():
+                log(logging.INFO, "📶 Connection lifetimes for %s", host, **stats)
+        if self.member_cache and was_running:
+            log(logging.INFO, "👥 Member cache stats", **self.member_cache.stats())
+        if self.attendance_writer and was_running:
+            self.attendance_writer.close()
+            log(logging.INFO, "🗄️  Attendance writer stats", **self.attendance_writer.stats())
+        if self.metrics_server:
+            self.metrics_server.shutdown()
+            self.metrics_server = None
+    
+    def drain(self, timeout):
+        """Wait up to `timeout` seconds for connection handlers to finish"""
+        with self.clients_lock:
+            clients = list(self.clients.items())
+        if not clients:
+            return
+        log(logging.INFO, "⏳ Draining %d connections", len(clients), timeout_s=timeout)
+        for client_socket, _ in clients:
+            try:
+                # Wakes the handler's recv() with EOF; the write side stays open for the last ACK
+                client_socket.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+        deadline = time.monotonic() + timeout
+        for _, thread in clients:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        with self.clients_lock:
+            remaining = len(self.clients)
+        if remaining:
+            log(logging.WARNING, "⚠️  %d connections still busy after drain timeout", remaining)
 
 def main():
-    import signal
+    import argparse
     import sys
     
-    # Configuration
-    HOST = '0.0.0.0'  # Listen on all interfaces
-    PORT = 5005       # Default port
+    parser = argparse.ArgumentParser(description='Simple TCP listener for ESP32 biometric devices')
+    parser.add_argument('port', nargs='?', type=int, default=5005, help='TCP port to listen on (default 5005)')
+    parser.add_argument('host', nargs='?', default='0.0.0.0', help='interface to bind (default all)')
+    parser.add_argument('--metrics-port', type=int, default=0,
+                        help='serve Prometheus metrics on this port (default off)')
+    parser.add_argument('--metrics-host', default='127.0.0.1', help='interface for the metrics endpoint')
+    parser.add_argument('--member-db', default=default_database_path(),
+                        help='app SQLite database for member lookups (default: same path as the Node app)')
+    parser.add_argument('--no-member-lookup', action='store_true',
+                        help='trust every sensor match without checking members/plans')
+    parser.add_argument('--member-cache-size', type=int, default=10000)
+    parser.add_argument('--dedup-window', type=float, default=1.0,
+                        help='seconds during which an identical (device, user, status) scan is ACKed '
+                             'without being handled again (0 disables)')
+    parser.add_argument('--record-attendance', action='store_true',
+                        help='persist time-log/attendance events to biometric_events in --member-db')
+    parser.add_argument('--attendance-batch-ms', type=float, default=2.0,
+                        help='longest an event waits for its group commit')
+    parser.add_argument('--attendance-batch-rows', type=int, default=200,
+                        help='commit early once this many events are waiting')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='worker processes sharing the port via SO_REUSEPORT (POSIX only; default 1)')
+    parser.add_argument('--drain-timeout', type=float, default=10.0,
+                        help='seconds SIGTERM waits for open connections to finish their current message')
+    parser.add_argument('--handler-threads', type=int, default=16,
+                        help='threads parsing and handling messages (per worker)')
+    parser.add_argument('--queue-size', type=int, default=1000,
+                        help='messages allowed to wait for a handler thread before backpressure')
+    parser.add_argument('--overload', default='pause', choices=['pause', 'busy'],
+                        help='when the queue is full: stop reading from the device (pause) '
+                             'or answer ACK:BUSY (busy)')
+    parser.add_argument('--idle-timeout', type=float, default=3600.0,
+                        help='close a device connection after this many seconds without data (0 disables)')
+    parser.add_argument('--read-timeout', type=float, default=0.5,
+                        help='seconds a partial message waits for the rest of its bytes before it is '
+                             'handled as it is')
+    parser.add_argument('--keepalive', default='60,10,5', metavar='IDLE,INTERVAL,COUNT',
+                        help="TCP keepalive: seconds idle before probing, seconds between probes, probes "
+                             "before the peer is dropped ('off' disables)")
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    parser.add_argument('--log-format', default='text', choices=['text', 'json'])
+    parser.add_argument('--log-sample', type=float, default=1.0,
+                        help='fraction of per-message log lines to emit (errors are never sampled)')
+    args = parser.parse_args()
+    if args.keepalive.lower() == 'off':
+        args.keepalive = None
+    else:
+        try:
+            args.keepalive = tuple(float(part) for part in args.keepalive.split(','))
+        except ValueError:
+            args.keepalive = ()
+        if len(args.keepalive) != 3:
+            parser.error("--keepalive takes IDLE,INTERVAL,COUNT (e.g. 60,10,5) or 'off'")
+    
+    configure_logging(getattr(logging, args.log_level), args.log_format == 'json', args.log_sample)
+    
+    if args.workers > 1:
+        if not workers_supported():
+            parser.error('--workers needs fork() and SO_REUSEPORT (not available on this platform)')
+        log(logging.INFO, "👷 Starting %d workers on %s:%s", args.workers, args.host, args.port)
+        supervisor = WorkerSupervisor(lambda index: run_listener(args, index), args.workers,
+                                      drain_timeout=args.drain_timeout,
+                                      log=lambda msg, **fields: log(logging.INFO, "👷 " + msg, **fields))
+        sys.exit(supervisor.run())
+    sys.exit(run_listener(args))
+
+def run_listener(args, worker=None):
+    """Build one listener from the CLI arguments and serve until stopped
+    
+    With `worker` set this runs inside a forked worker process: the member
+    cache, attendance writer and metrics server are created here, after the
+    fork, and each worker serves metrics on --metrics-port plus its index.
+    """
+    import signal
+    
+    if worker is not None:
+        configure_logging(getattr(logging, args.log_level), args.log_format == 'json', args.log_sample,
+                          worker=worker)
+    
+    member_cache = None
+    if not args.no_member_lookup:
+        try:
+            member_cache = MemberCache(args.member_db, max_size=args.member_cache_size)
+            started = time.perf_counter()
+            warmed = member_cache.warm()
+            log(logging.INFO, "👥 Member cache warmed with %d members in %.1f ms", warmed,
+                (time.perf_counter() - started) * 1000, db=args.member_db)
+        except (OSError, sqlite3.Error) as e:
+            log(logging.WARNING, "⚠️  Member lookups disabled: %s", e)
     
-    # Allow command line arguments
-    if len(sys.argv) > 1:
-        PORT = int(sys.argv[1])
-    if len(sys.argv) > 2:
-        HOST = sys.argv[2]
+    attendance_writer = None
+    if args.record_attendance:
+        try:
+            attendance_writer = AttendanceWriter(args.member_db, max_batch=args.attendance_batch_rows,
+                                                 max_delay=args.attendance_batch_ms / 1000.0).start()
+            log(logging.INFO, "🗄️  Recording attendance events", db=args.member_db)
+        except sqlite3.Error as e:
+            log(logging.ERROR, "❌ Cannot open %s for attendance writes: %s", args.member_db, e)
+            return 1
     
-    listener = SimpleBiometricListener(HOST, PORT)
+    metrics_port = args.metrics_port
+    if metrics_port and worker is not None:
+        metrics_port += worker
+    listener = SimpleBiometricListener(args.host, args.port, metrics_port=metrics_port,
+                                       metrics_host=args.metrics_host, member_cache=member_cache,
+                                       attendance_writer=attendance_writer, dedup_window=args.dedup_window,
+                                       reuse_port=worker is not None, handler_threads=args.handler_threads,
+                                       max_queue=args.queue_size, overload=args.overload,
+                                       read_timeout=args.read_timeout, idle_timeout=args.idle_timeout,
+                                       keepalive=args.keepalive)
     
-    # Handle Ctrl+C gracefully
+    # Ctrl+C stops at once; SIGTERM (service stop, supervisor) drains open connections first.
+    # Later signals are ignored: with --workers a process-group stop delivers SIGTERM from
+    # the init system and again from the supervisor, and a second handler run would raise
+    # SystemExit inside the first one's drain and drop the in-flight ACKs.
     def signal_handler(sig, frame):
-        print("\n🛑 Interrupt received, shutting down...")
-        listener.stop()
-        sys.exit(0)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        log(logging.INFO, "🛑 %s received, shutting down...", signal.Signals(sig).name)
+        listener.stop(drain_timeout=args.drain_timeout if sig == signal.SIGTERM else 0.0)
+        raise SystemExit(0)
     
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
@@ -421,9 +1119,10 @@ def main():
     try:
         listener.start()
     except KeyboardInterrupt:
-        print("\n🛑 Keyboard interrupt received")
+        log(logging.INFO, "🛑 Keyboard interrupt received")
     finally:
         listener.stop()
+    return 0
 
 if __name__ == "__main__":
     main()